@@ -0,0 +1,223 @@
+'''
+Eyeliner's alignment rules, free of any RoboFont dependency, so they can be
+shared by the glyph editor subscriber and the headless watch mode.
+'''
+
+import math
+from collections import namedtuple
+from fontTools.misc.fixedTools import otRound
+
+
+
+# Target categories
+GLOBAL_GUIDE    = "globalGuide"
+LOCAL_GUIDE     = "localGuide"
+FONT_DIMENSION  = "fontDimension"
+BLUE            = "blue"
+FAMILY_BLUE     = "familyBlue"
+MARGIN          = "margin"
+IMPLICIT        = "implicit"
+ANCHOR_MATCH    = "anchorMatch"     # Same as the dominant value of same-named anchors
+ANCHOR_MISMATCH = "anchorMismatch"  # Close to it, but off
+
+# Which settings checkbox shows each category
+CATEGORY_SETTINGS = {
+    GLOBAL_GUIDE:   "showGlobalGuidesCheckbox",
+    LOCAL_GUIDE:    "showLocalGuidesCheckbox",
+    FONT_DIMENSION: "showFontDimensionsCheckbox",
+    BLUE:           "showBluesCheckbox",
+    FAMILY_BLUE:    "showFamilyBluesCheckbox",
+    MARGIN:         "showMarginsCheckbox",
+    IMPLICIT:       "showImplicitTargetsCheckbox",
+}
+
+
+Match = namedtuple("Match", ["category", "value", "angle", "color"])
+
+
+def is_on_diagonal(pta, angle, ptb, tol=0.08):
+    if pta == ptb:
+        return True
+
+    ar = math.radians(angle)%math.pi
+    ca = math.cos(ar)
+    sa = math.sin(ar)
+    x_diff = ptb[0] - pta[0]
+    y_diff = ptb[1] - pta[1]
+
+    if not math.isclose(ca, 0, abs_tol=tol) and not math.isclose(sa, 0, abs_tol=tol):
+        # Diagonal, distances for x and y should match
+        tdx = x_diff / ca
+        tdy = y_diff / sa
+        return math.isclose(tdx, tdy, abs_tol=5)
+
+    elif math.isclose(ca, 1, abs_tol=tol) and math.isclose(sa, 0, abs_tol=tol):
+        # Horizontal, so y should match
+        return math.isclose(pta[1], ptb[1], abs_tol=tol)
+
+    elif math.isclose(ca, 0, abs_tol=tol) and math.isclose(sa, 1, abs_tol=tol):
+        # Vertical, so x should match
+        return math.isclose(pta[0], ptb[0], abs_tol=tol)
+
+    return False
+
+
+def sort_guidelines(guidelines, default_color):
+    '''
+    Split (x, y, angle, color) guidelines into horizontal {y: color}, vertical {x: color}
+    and diagonal [((x, y), angle, color)] targets.
+    '''
+    guide_ys, guide_xs, guide_diags = {}, {}, []
+    for x, y, angle, color in guidelines:
+        color = color or default_color
+        if angle in [0, 180]:
+            guide_ys[otRound(y)] = color
+        elif angle in [90, 270]:
+            guide_xs[otRound(x)] = color
+        else:
+            guide_diags.append(((x, y), angle, color))
+    return guide_ys, guide_xs, guide_diags
+
+
+
+class FontTargets:
+    '''
+    Font-level alignment targets: font dimensions, blues, font guidelines and implicit targets.
+    Treat as immutable once built; build a new one when something changes.
+
+    enabled maps a category to whether its eyes are shown, and colors maps
+    a category to its eye color (guides carry their own colors).
+
+    In italic fonts, margins (and, with slant_vertical_guides, vertical guides)
+    follow the italic angle. The slant is stored as a shear factor, so checking
+    a point against them costs a multiply-add instead of trigonometry.
+    '''
+
+    def __init__(self,
+            font_dims    = (),
+            blues        = (),
+            family_blues = (),
+            guide_ys     = None,
+            guide_xs     = None,
+            guide_diags  = (),
+            implicit_xs  = frozenset(),
+            implicit_ys  = frozenset(),
+            enabled      = None,
+            colors       = None,
+            italic_angle = 0,
+            slant_offset = 0,
+            slant_vertical_guides = False,
+            ):
+        self.font_dims    = frozenset(v for v in font_dims if v is not None)
+        self.blues        = frozenset(blues)
+        self.family_blues = frozenset(family_blues)
+        self.guide_ys     = dict(guide_ys or {})
+        self.guide_xs     = dict(guide_xs or {})
+        self.guide_diags  = tuple(guide_diags)
+        self.implicit_xs  = frozenset(implicit_xs)
+        self.implicit_ys  = frozenset(implicit_ys)
+        self.enabled      = dict(enabled) if enabled is not None else {category: True for category in CATEGORY_SETTINGS}
+        self.colors       = dict(colors or {})
+
+        self.italic_angle = italic_angle or 0
+        # x - shear * y is where a point would be, with the slant taken out.
+        self.shear        = -math.tan(math.radians(self.italic_angle))
+        self.slant_angle  = 90 + self.italic_angle
+        self.slant_offset = (slant_offset or 0) if self.shear else 0
+        self.slant_vertical_guides = bool(slant_vertical_guides and self.shear)
+
+
+    def horizontal_category(self, y):
+        '''The category that claims a rounded y value, or None. The first in line wins.'''
+        if y in self.guide_ys:
+            return GLOBAL_GUIDE
+        elif y in self.font_dims:
+            return FONT_DIMENSION
+        elif y in self.blues:
+            return BLUE
+        elif y in self.family_blues:
+            return FAMILY_BLUE
+        elif y in self.implicit_ys:
+            return IMPLICIT
+        return None
+
+
+    def vertical_category(self, x):
+        '''The category that claims a rounded x value, or None (margins are per glyph).'''
+        if x in self.guide_xs:
+            return GLOBAL_GUIDE
+        elif x in self.implicit_xs:
+            return IMPLICIT
+        return None
+
+
+
+class GlyphTargets:
+    '''A glyph's alignment targets: the font's, plus its own guidelines and margins'''
+
+    def __init__(self, font_targets, width=0, guide_ys=None, guide_xs=None, guide_diags=()):
+        self.font_targets = font_targets
+        self.width        = width
+        offset            = font_targets.slant_offset
+        self.margins      = (otRound(offset), otRound(width + offset))
+        self.guide_ys     = dict(guide_ys or {})
+        self.guide_xs     = dict(guide_xs or {})
+        self.guide_diags  = tuple(guide_diags)
+
+
+    def match(self, coord):
+        '''Return a tuple of Matches for a point; a match of a hidden category ends the search for its direction.'''
+        ft = self.font_targets
+        matches = []
+        x, y = coord[0], coord[1]
+
+        # ==== HORIZONTAL STUFF ==== #
+        ry = otRound(y)
+        if ry in ft.guide_ys:
+            self.add(matches, GLOBAL_GUIDE, ry, 0, ft.guide_ys[ry])
+        elif ry in self.guide_ys:
+            self.add(matches, LOCAL_GUIDE, ry, 0, self.guide_ys[ry])
+        elif ry in ft.font_dims:
+            self.add(matches, FONT_DIMENSION, ry, 0)
+        elif ry in ft.blues:
+            self.add(matches, BLUE, ry, 0)
+        elif ry in ft.family_blues:
+            self.add(matches, FAMILY_BLUE, ry, 0)
+        elif ry in ft.implicit_ys:
+            self.add(matches, IMPLICIT, ry, 0)
+
+        # ==== VERTICAL STUFF ==== #
+        rx = otRound(x)
+        # Unslanted x, for the targets that follow the italic angle
+        sx = otRound(x - ft.shear * y) if ft.shear else rx
+        if ft.slant_vertical_guides:
+            gx, guide_angle = sx, ft.slant_angle
+        else:
+            gx, guide_angle = rx, 90
+        if gx in ft.guide_xs:
+            self.add(matches, GLOBAL_GUIDE, gx, guide_angle, ft.guide_xs[gx])
+        elif gx in self.guide_xs:
+            self.add(matches, LOCAL_GUIDE, gx, guide_angle, self.guide_xs[gx])
+        elif sx in self.margins:
+            self.add(matches, MARGIN, sx, ft.slant_angle)
+        elif rx in ft.implicit_xs:
+            self.add(matches, IMPLICIT, rx, 90)
+
+        # ==== DIAGONAL STUFF ==== #
+        for origin, angle, color in self.guide_diags:
+            if is_on_diagonal(origin, angle, (x, y)):
+                self.add(matches, LOCAL_GUIDE, origin, angle, color)
+        for origin, angle, color in ft.guide_diags:
+            if is_on_diagonal(origin, angle, (x, y)):
+                self.add(matches, GLOBAL_GUIDE, origin, angle, color)
+
+        return tuple(matches)
+
+
+    def add(self, matches, category, value, angle, color=None):
+        ft = self.font_targets
+        if not ft.enabled.get(category):
+            return
+        if color is None:
+            color = ft.colors.get(category)
+        matches.append(Match(category, value, angle, color))
@@ -0,0 +1,89 @@
+from collections import Counter, defaultdict
+from fontTools.misc.fixedTools import otRound
+from fontindex import FontIndex
+
+
+
+MIN_SIBLINGS = 2  # How many other glyphs need to agree on a value before it counts as dominant.
+TOLERANCE    = 5  # Anchors this close to their siblings' dominant value are flagged as off.
+
+
+class AnchorIndex(FontIndex):
+    '''
+    For each anchor name in a font, the distribution of its y values and of
+    its x offsets from the center of the glyph's width.
+    '''
+
+    _registry = None
+    # Anchor x offsets are relative to the width.
+    glyph_notifications = ("Glyph.AnchorsChanged", "Glyph.WidthChanged")
+
+
+    def new_data(self):
+        # Per anchor name: counts of its ys, counts of its x offsets
+        return defaultdict(Counter), defaultdict(Counter)
+
+
+    def contribution(self, glyph):
+        return tuple(sorted(
+            (anchor.name, otRound(anchor.y), otRound(anchor.x - glyph.width / 2))
+            for anchor in glyph.anchors
+            if anchor.name
+            ))
+
+
+    def combine(self, data, contribution, sign):
+        ys, x_offsets = data
+        for name, y, x_offset in contribution:
+            ys[name][y] += sign
+            x_offsets[name][x_offset] += sign
+
+
+    def dominant(self, name, glyph_name):
+        '''
+        Return the (y, x offset) most used for this anchor name by the *other* glyphs.
+        Either value is None if it isn't shared by enough glyphs.
+        '''
+        # Never wait on the lock while the first scan is being combined.
+        if not self.ready:
+            return None, None
+        with self.lock:
+            all_ys, all_x_offsets = self.data
+            if name not in all_ys:
+                return None, None
+            ys = Counter(all_ys[name])
+            x_offsets = Counter(all_x_offsets[name])
+            for own_name, y, x_offset in self.contributions.get(glyph_name, ()):
+                if own_name == name:
+                    ys[y] -= 1
+                    x_offsets[x_offset] -= 1
+        return get_dominant(ys), get_dominant(x_offsets)
+
+
+    def check(self, name, glyph_name, coord, width):
+        '''
+        Compare an anchor against same-named anchors in the rest of the font.
+        Return (angle, matched, dominant) triples: angle 0 for its y, 90 for its x offset;
+        matched is False when it's close to the dominant value, but off.
+        '''
+        dominant_y, dominant_x_offset = self.dominant(name, glyph_name)
+        y = otRound(coord[1])
+        x_offset = otRound(coord[0] - width / 2)
+        results = []
+        for value, dominant, angle in [(y, dominant_y, 0), (x_offset, dominant_x_offset, 90)]:
+            if dominant is None:
+                continue
+            if value == dominant:
+                results.append((angle, True, dominant))
+            elif abs(value - dominant) <= TOLERANCE:
+                results.append((angle, False, dominant))
+        return results
+
+
+def get_dominant(counter):
+    if not counter:
+        return None
+    value, count = counter.most_common(1)[0]
+    if count < MIN_SIBLINGS:
+        return None
+    return value
@@ -0,0 +1,121 @@
+'''
+Eyeliner's frame budget: a cap on how much main-thread time it spends per pass.
+
+Work is requested under a key with a priority (lower runs first), and runs on the
+next pass of the run loop. Once a pass has used up its budget, whatever is left
+waits until the editor is idle, and a newer request under the same key replaces it.
+To see how often the budget was overrun, from the Scripting Window:
+
+    from budget import get_budget_stats
+    print(get_budget_stats())
+'''
+
+import time
+from collections import namedtuple
+
+
+
+DEFAULT_BUDGET_MS = 8
+IDLE_DELAY = 0.05  # Seconds without new requests before deferred work gets its turn
+
+# passes: how many passes ran
+# overruns: how many of them went over their budget
+# deferred: how many times a pass left work for later
+# worst_ms: the longest pass
+BudgetStats = namedtuple("BudgetStats", ["passes", "overruns", "deferred", "worst_ms"])
+
+_stats = {"passes": 0, "overruns": 0, "deferred": 0, "worst_ms": 0.0}
+
+
+def get_budget_stats():
+    '''Budget statistics for all glyph editors, since RoboFont started (or the last reset)'''
+    return BudgetStats(**_stats)
+
+
+def reset_budget_stats():
+    _stats.update(passes=0, overruns=0, deferred=0, worst_ms=0.0)
+
+
+
+class FrameBudget:
+
+    def __init__(self, budget_ms=DEFAULT_BUDGET_MS, partial_callback=None):
+        self.budget_ms = budget_ms
+        self.partial_callback = partial_callback
+        self.pending = {}  # key: (priority, func)
+        self.activity = 0  # Bumped by every request, to tell when the editor has gone idle
+        self.scheduled = False
+        self.partial = False
+        self.closed = False
+
+
+    def request(self, key, priority, func):
+        '''Run func on the next pass, replacing anything still pending under key'''
+        self.pending.pop(key, None)
+        self.pending[key] = (priority, func)
+        self.activity += 1
+        if not self.scheduled:
+            from PyObjCTools.AppHelper import callAfter
+            self.scheduled = True
+            callAfter(self.run_pass)
+
+
+    def cancel(self, key):
+        self.pending.pop(key, None)
+
+
+    def close(self):
+        self.pending.clear()
+        self.closed = True
+
+
+    def run_pass(self):
+        self.scheduled = False
+        if self.closed or not self.pending:
+            return
+        start = time.perf_counter()
+        try:
+            # The most important work first; at least one item runs, so nothing starves.
+            for key in sorted(self.pending, key=lambda key: self.pending[key][0]):
+                # An earlier job in this pass may have cancelled it.
+                entry = self.pending.pop(key, None)
+                if entry is None:
+                    continue
+                priority, func = entry
+                func()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if elapsed_ms >= self.budget_ms:
+                    break
+        finally:
+            # Even if a job failed, so the stats and the partial note stay true.
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _stats["passes"] += 1
+            _stats["worst_ms"] = max(_stats["worst_ms"], elapsed_ms)
+            if elapsed_ms > self.budget_ms:
+                _stats["overruns"] += 1
+            if self.pending:
+                _stats["deferred"] += 1
+                self.wait_for_idle()
+            self.set_partial(bool(self.pending))
+
+
+    def wait_for_idle(self):
+        from PyObjCTools.AppHelper import callLater
+        callLater(IDLE_DELAY, self.idle_check, self.activity)
+
+
+    def idle_check(self, activity):
+        if self.closed or self.scheduled or not self.pending:
+            return
+        if activity != self.activity:
+            # Still busy, so keep waiting
+            self.wait_for_idle()
+            return
+        self.run_pass()
+
+
+    def set_partial(self, partial):
+        if partial != self.partial:
+            self.partial = partial
+            if self.partial_callback is not None:
+                self.partial_callback(partial)
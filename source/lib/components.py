@@ -0,0 +1,82 @@
+import numpy as np
+from compute import get_oncurves, get_component_oncurves, match_points
+from results import COMPONENT
+
+
+
+class ComponentPoints:
+    '''
+    The decomposed on-curve points of a glyph's components, and their matches, kept between checks.
+
+    Each base glyph's on-curves (its own components included) are flattened into an
+    array once. When a component is moved or transformed, only that component's array
+    is transformed again, with one matrix multiply, and only its points are matched again.
+    Only ever used from the worker thread.
+    '''
+
+    def __init__(self):
+        self.base_arrays = {}  # base name: (n, 2) array of on-curves
+        self.matched = {}      # (base name, transformation): AlignmentEntries
+        self.bases = {}        # the base snapshots the arrays were made from
+        self.targets = None
+        self.oncurves = None
+
+
+    def base_array(self, base_name, bases):
+        if base_name not in self.base_arrays:
+            base = bases[base_name]
+            points = get_oncurves(base) + get_component_oncurves(base, bases)
+            self.base_arrays[base_name] = np.array(points, dtype=float).reshape(-1, 2)
+        return self.base_arrays[base_name]
+
+
+    def transform(self, base_name, transformation, bases):
+        xx, xy, yx, yy, dx, dy = transformation
+        matrix = np.array([[xx, xy], [yx, yy]], dtype=float)
+        array = self.base_array(base_name, bases) @ matrix + (dx, dy)
+        return [tuple(pt) for pt in array.tolist()]
+
+
+    def forget_changed_bases(self, bases):
+        '''Drop the arrays and matches of base glyphs that changed, or that use one that did (nested)'''
+        if bases is self.bases:
+            return
+        changed = {name for name in set(bases) | set(self.bases) if bases.get(name) != self.bases.get(name)}
+        self.bases = bases
+        if not changed:
+            return
+        def uses_changed(base_name, seen=()):
+            if base_name in changed:
+                return True
+            base = bases.get(base_name)
+            if base is None or base_name in seen:
+                return False
+            return any(uses_changed(name, seen + (base_name,)) for name, _ in base.components)
+        self.base_arrays = {name: array for name, array in self.base_arrays.items() if not uses_changed(name)}
+        self.matched = {key: entries for key, entries in self.matched.items() if key[0] in self.base_arrays}
+
+
+    def match(self, snapshot, bases, targets):
+        '''AlignmentEntries for the component points that the glyph's own on-curves don't already cover'''
+        oncurves = set(get_oncurves(snapshot))
+        self.forget_changed_bases(bases)
+        if targets is not self.targets or oncurves != self.oncurves:
+            # Every component needs to be matched again.
+            self.matched = {}
+            self.targets, self.oncurves = targets, oncurves
+
+        matched = {}
+        entries = []
+        for base_name, transformation in snapshot.components:
+            if base_name not in bases:
+                continue
+            key = (base_name, transformation)
+            if key not in matched:
+                if key in self.matched:
+                    matched[key] = self.matched[key]
+                else:
+                    coords = [pt for pt in self.transform(base_name, transformation, bases) if pt not in oncurves]
+                    matched[key] = match_points(targets, coords, COMPONENT)
+            entries += matched[key]
+        self.matched = matched
+        return entries
@@ -0,0 +1,190 @@
+'''
+The compute stage of Eyeliner: extraction, decomposition and matching.
+
+Everything here works on immutable snapshots of glyphs, so it can run on the
+worker thread while the glyph keeps changing on the main thread. Only
+snapshot_glyph() and snapshot_bases() read from the font, on the main thread.
+'''
+
+from collections import namedtuple
+from fontTools.misc.bezierTools import segmentSegmentIntersections
+from fontTools.misc.fixedTools import otRound
+from fontTools.pens.basePen import decomposeQuadraticSegment
+from fontTools.pens.pointPen import AbstractPointPen
+from results import AlignmentEntry
+
+
+
+IDENTITY = (1, 0, 0, 1, 0, 0)
+
+# contours: ((x, y, segmentType), ...) per contour
+# components: (base glyph name, transformation) pairs
+# anchors: (name, x, y) triples
+GlyphSnapshot = namedtuple("GlyphSnapshot", ["name", "width", "contours", "components", "anchors"])
+
+
+class SnapshotPointPen(AbstractPointPen):
+
+    def __init__(self):
+        self.contours = []
+        self.components = []
+        self.current = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.current = []
+
+    def endPath(self):
+        self.contours.append(tuple(self.current))
+        self.current = None
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self.current.append((pt[0], pt[1], segmentType))
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        self.components.append((baseGlyphName, tuple(transformation)))
+
+
+def snapshot_glyph(glyph):
+    '''Copy what the compute stage needs out of a (fontParts) glyph'''
+    pen = SnapshotPointPen()
+    glyph.drawPoints(pen)
+    return GlyphSnapshot(
+        glyph.name,
+        glyph.width,
+        tuple(pen.contours),
+        tuple(pen.components),
+        tuple((anchor.name, anchor.x, anchor.y) for anchor in glyph.anchors),
+        )
+
+
+def snapshot_bases(font, snapshot, known=None):
+    '''
+    Snapshot every glyph the snapshot's components use, however deeply nested.
+    Snapshots in known (base name: snapshot) are reused instead of being taken again.
+    '''
+    known = known or {}
+    bases = {}
+    todo = [base_name for base_name, _ in snapshot.components]
+    while todo:
+        base_name = todo.pop()
+        if base_name in bases or base_name not in font:
+            continue
+        bases[base_name] = known.get(base_name) or snapshot_glyph(font[base_name])
+        todo.extend(name for name, _ in bases[base_name].components)
+    return bases
+
+
+# ==== Extraction ==== #
+
+def get_oncurves(snapshot):
+    return [(x, y) for contour in snapshot.contours for x, y, segment_type in contour if segment_type is not None]
+
+
+def transform_point(transformation, point):
+    xx, xy, yx, yy, dx, dy = transformation
+    x, y = point
+    return (xx * x + yx * y + dx, xy * x + yy * y + dy)
+
+
+def multiply(outer, inner):
+    '''Combine two affine transformations, applying inner first'''
+    a1, b1, c1, d1, e1, f1 = outer
+    a2, b2, c2, d2, e2, f2 = inner
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+        )
+
+
+def get_component_oncurves(snapshot, bases, transformation=IDENTITY, seen=()):
+    '''On-curve points of a glyph's components, as if they were decomposed'''
+    if snapshot.name in seen:
+        return []
+    seen = seen + (snapshot.name,)
+    points = []
+    for base_name, base_transformation in snapshot.components:
+        base = bases.get(base_name)
+        if base is None:
+            continue
+        combined = multiply(transformation, base_transformation)
+        points.extend(transform_point(combined, pt) for pt in get_oncurves(base))
+        points.extend(get_component_oncurves(base, bases, combined, seen))
+    return points
+
+
+def get_preview_oncurves(preview, snapshot=None):
+    '''Rounded, unique on-curves of a tool's preview glyph that the glyph doesn't already have'''
+    existing = set(get_oncurves(snapshot)) if snapshot is not None else set()
+    coords = []
+    for pt in get_oncurves(preview):
+        if pt in existing:
+            continue
+        coord = (otRound(pt[0]), otRound(pt[1]))
+        if coord not in coords:
+            coords.append(coord)
+    return coords
+
+
+def iter_segments(contour):
+    '''Yield each segment of a point contour as a list of points, on-curve to on-curve'''
+    on_indexes = [i for i, (x, y, segment_type) in enumerate(contour) if segment_type is not None]
+    if not on_indexes:
+        # A TrueType contour of only off-curves: it starts and ends on the on-curve implied between its last and first points.
+        if len(contour) > 1:
+            (x0, y0, _), (x1, y1, _) = contour[-1], contour[0]
+            current = ((x0 + x1) / 2, (y0 + y1) / 2)
+            for off, on in decomposeQuadraticSegment([pt[:2] for pt in contour] + [current]):
+                yield [current, off, on]
+                current = on
+        return
+    is_open = contour[0][2] == "move"
+    start = on_indexes[0]
+    points = contour[start:] + contour[:start]
+    previous = points[0]
+    offcurves = []
+    for x, y, segment_type in points[1:] + (() if is_open else (points[0],)):
+        if segment_type is None:
+            offcurves.append((x, y))
+            continue
+        if segment_type == "qcurve" and len(offcurves) > 1:
+            current = previous[:2]
+            for off, on in decomposeQuadraticSegment(offcurves + [(x, y)]):
+                yield [current, off, on]
+                current = on
+        else:
+            yield [previous[:2]] + offcurves + [(x, y)]
+        previous = (x, y, segment_type)
+        offcurves = []
+
+
+def get_line_intersections(snapshot, line):
+    '''Rounded points where a line crosses the snapshot's contours (like the Slice Tool)'''
+    line = [tuple(line[0]), tuple(line[1])]
+    if line[0] == line[1]:
+        return []
+    points = []
+    for contour in snapshot.contours:
+        for segment in iter_segments(contour):
+            for intersection in segmentSegmentIntersections(segment, line):
+                # Both within the segment and within the line
+                if 0 <= intersection.t1 <= 1 and 0 <= intersection.t2 <= 1:
+                    point = (otRound(intersection.pt[0]), otRound(intersection.pt[1]))
+                    # A line through an on-curve point crosses both of its segments there.
+                    if point not in points:
+                        points.append(point)
+    return points
+
+
+# ==== Matching ==== #
+
+def match_points(targets, coords, source):
+    '''Match points against targets, returning an AlignmentEntry per match'''
+    entries = []
+    for coord in coords:
+        for match in targets.match(coord):
+            entries.append(AlignmentEntry(coord, source, match.category, match.value, match.angle, match.color))
+    return entries
@@ -1,5 +1,6 @@
 from colorsys import rgb_to_hsv, hsv_to_rgb
 from mojo.UI import getDefault
+from mojo.extensions import getExtensionDefault
 
 
 def get_flattened_alpha(color):
@@ -21,19 +22,46 @@ def get_darkened_blue(color):
 
 
 EXTENSION_KEY = 'com.ryanbugden.eyeliner.settings'
-EXTENSION_DEFAULTS = {
-    "showLocalGuidesCheckbox": True,
-    "showGlobalGuidesCheckbox": True,
-    "showFontDimensionsCheckbox": True,
-    "fontDimensionsLightColorWell": get_flattened_alpha(getDefault("glyphViewFontMetricsStrokeColor")),
-    "fontDimensionsDarkColorWell": get_flattened_alpha(getDefault("glyphViewFontMetricsStrokeColor.dark")),
-    "showBluesCheckbox": True,
-    "bluesLightColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewBluesColor"))),
-    "bluesDarkColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewBluesColor.dark"))),
-    "showFamilyBluesCheckbox": True,
-    "familyBluesLightColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewFamilyBluesColor"))),
-    "familyBluesDarkColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewFamilyBluesColor.dark"))),
-    "showMarginsCheckbox": False,
-    "marginsLightColorWell": (0.5, 0.5, 0.5, 1),
-    "marginsDarkColorWell": (0.5, 0.5, 0.5, 1),
-}
\ No newline at end of file
+_extension_defaults = None
+
+
+def get_extension_defaults():
+    # Built on first use, since the color defaults need a few preference lookups
+    global _extension_defaults
+    if _extension_defaults is None:
+        _extension_defaults = {
+            "showLocalGuidesCheckbox": True,
+            "showGlobalGuidesCheckbox": True,
+            "showFontDimensionsCheckbox": True,
+            "fontDimensionsLightColorWell": get_flattened_alpha(getDefault("glyphViewFontMetricsStrokeColor")),
+            "fontDimensionsDarkColorWell": get_flattened_alpha(getDefault("glyphViewFontMetricsStrokeColor.dark")),
+            "showBluesCheckbox": True,
+            "bluesLightColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewBluesColor"))),
+            "bluesDarkColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewBluesColor.dark"))),
+            "showFamilyBluesCheckbox": True,
+            "familyBluesLightColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewFamilyBluesColor"))),
+            "familyBluesDarkColorWell": get_darkened_blue(get_flattened_alpha(getDefault("glyphViewFamilyBluesColor.dark"))),
+            "showMarginsCheckbox": False,
+            "marginsLightColorWell": (0.5, 0.5, 0.5, 1),
+            "marginsDarkColorWell": (0.5, 0.5, 0.5, 1),
+            "showInSpaceCenterCheckbox": False,
+            "showInFontOverviewCheckbox": False,
+            "slantVerticalGuidesCheckbox": False,
+            "frameBudgetField": 8,
+            "showImplicitTargetsCheckbox": False,
+            "implicitTargetsLightColorWell": (0.0, 0.55, 0.5, 1),
+            "implicitTargetsDarkColorWell": (0.3, 0.8, 0.75, 1),
+            "showAnchorConsistencyCheckbox": False,
+            "anchorConsistencyLightColorWell": (0.55, 0.2, 0.75, 1),
+            "anchorConsistencyDarkColorWell": (0.75, 0.5, 0.95, 1),
+            "anchorMismatchLightColorWell": (0.9, 0.15, 0.1, 1),
+            "anchorMismatchDarkColorWell": (1.0, 0.4, 0.3, 1),
+        }
+    return _extension_defaults
+
+
+def load_settings():
+    # Stored settings may predate newer options, so fill in any missing keys
+    settings = dict(get_extension_defaults())
+    settings.update(getExtensionDefault(EXTENSION_KEY, fallback={}))
+    return settings
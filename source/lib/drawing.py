@@ -0,0 +1,167 @@
+import math
+
+
+
+KAPPA = 0.5523  # Bezier handle length for a quarter circle.
+
+
+def draw_eye(pen, center, radius, angle=0, stretch=0.7):
+    '''Draw the Eyeliner eye outline into a pen, centered on a point and rotated by angle'''
+    cx, cy = center
+    ca, sa = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    def t(x, y):
+        return (cx + x * ca - y * sa, cy + x * sa + y * ca)
+    w = radius * stretch
+    pen.moveTo(t(6 * w, 0))
+    pen.curveTo(t(2 * w, 0), t(1.25 * w, -radius), t(0, -radius))
+    pen.curveTo(t(-1.25 * w, -radius), t(-2 * w, 0), t(-6 * w, 0))
+    pen.curveTo(t(-2 * w, 0), t(-1.25 * w, radius), t(0, radius))
+    pen.curveTo(t(1.25 * w, radius), t(2 * w, 0), t(6 * w, 0))
+    pen.closePath()
+
+
+def draw_point(pen, center, size, shape):
+    '''Draw an on-curve point marker ("rectangle" or "oval") into a pen'''
+    cx, cy = center
+    r = size / 2
+    if shape == "oval":
+        k = r * KAPPA
+        pen.moveTo((cx + r, cy))
+        pen.curveTo((cx + r, cy + k), (cx + k, cy + r), (cx, cy + r))
+        pen.curveTo((cx - k, cy + r), (cx - r, cy + k), (cx - r, cy))
+        pen.curveTo((cx - r, cy - k), (cx - k, cy - r), (cx, cy - r))
+        pen.curveTo((cx + k, cy - r), (cx + r, cy - k), (cx + r, cy))
+    else:
+        pen.moveTo((cx - r, cy - r))
+        pen.lineTo((cx + r, cy - r))
+        pen.lineTo((cx + r, cy + r))
+        pen.lineTo((cx - r, cy + r))
+    pen.closePath()
+
+
+
+class EyeBatch:
+    '''
+    Collects eyes and point markers per container, and draws each distinct style
+    (symbol, color, rotation) as a single path layer.
+    Layer count grows with the number of styles in use, not the number of points.
+
+    Containers are referred to by identifier, and only created (through
+    container_factory) the first time there is something to draw in them.
+
+    Eyes keep their on-screen size, so zooming redraws them. With a scheduler,
+    scheduler(identifier, func) decides when each container gets redrawn,
+    instead of all of them right away.
+    '''
+
+    def __init__(self, container_factory, scheduler=None):
+        self.container_factory = container_factory
+        self.scheduler = scheduler
+        self.containers = {}  # identifier: container
+        self.pending = {}     # identifier: {style: [coord, ...]}
+        self.drawn   = {}     # identifier: {style: [coord, ...]}, kept for redrawing at a new scale
+        self.layers  = {}     # identifier: {style: path layer}
+        self.rendered = {}    # identifier: the geometry() it was last drawn with
+        self.scale = 1
+        self.eye_radius = 5
+        self.point_radius = 2.5
+
+
+    def set_sizes(self, eye_radius, point_radius):
+        self.eye_radius = eye_radius
+        self.point_radius = point_radius
+        self.redraw()
+
+
+    def set_scale(self, scale):
+        '''Eyes keep the same on-screen size, so their geometry follows the zoom'''
+        if not scale or scale == self.scale:
+            return
+        self.scale = scale
+        self.redraw()
+
+
+    def begin(self, identifier):
+        self.pending[identifier] = {}
+
+
+    def add_eye(self, identifier, coord, color, angle):
+        style = ("eye", tuple(color), angle)
+        self.pending.setdefault(identifier, {}).setdefault(style, []).append(coord)
+
+
+    def add_point(self, identifier, coord, color, shape):
+        style = (shape, tuple(color), 0)
+        self.pending.setdefault(identifier, {}).setdefault(style, []).append(coord)
+
+
+    def flush(self, identifier):
+        groups = self.pending.pop(identifier, {})
+        if not groups and identifier not in self.containers:
+            return
+        self.drawn[identifier] = groups
+        self.render(identifier)
+
+
+    def clear(self, identifier):
+        self.pending.pop(identifier, None)
+        self.drawn.pop(identifier, None)
+        self.layers.pop(identifier, None)
+        self.rendered.pop(identifier, None)
+        if identifier in self.containers:
+            self.containers[identifier].clearSublayers()
+
+
+    def clear_all(self):
+        for identifier in list(self.containers):
+            self.clear(identifier)
+
+
+    def geometry(self):
+        return (self.scale, self.eye_radius, self.point_radius)
+
+
+    def redraw(self):
+        for identifier in list(self.drawn):
+            if self.scheduler is None:
+                self.refresh(identifier)
+            else:
+                self.scheduler(identifier, lambda identifier=identifier: self.refresh(identifier))
+
+
+    def refresh(self, identifier):
+        # Skip containers that were drawn at the current size meanwhile.
+        if identifier in self.drawn and self.rendered.get(identifier) != self.geometry():
+            self.render(identifier)
+
+
+    def render(self, identifier):
+        groups = self.drawn.get(identifier, {})
+        layers = self.layers.get(identifier, {})
+        container = self.containers.get(identifier)
+        if container is None:
+            container = self.containers[identifier] = self.container_factory(identifier)
+        if set(layers) != set(groups):
+            # The set of styles changed: rebuild, so eyes always sit below point markers.
+            container.clearSublayers()
+            layers = {}
+            for style in sorted(groups, key=lambda style: style[0] != "eye"):
+                kind, color, angle = style
+                if kind == "eye":
+                    layers[style] = container.appendPathSublayer(fillColor=None, strokeColor=color)
+                else:
+                    layers[style] = container.appendPathSublayer(fillColor=color, strokeColor=None)
+            self.layers[identifier] = layers
+        self.rendered[identifier] = self.geometry()
+        eye_radius = self.eye_radius / self.scale
+        point_size = round(self.point_radius * 2) / self.scale
+        for style, layer in layers.items():
+            kind, color, angle = style
+            pen = layer.getPen(clear=True)
+            if kind == "eye":
+                layer.setStrokeWidth(1 / self.scale)
+                for coord in groups[style]:
+                    draw_eye(pen, coord, eye_radius, angle)
+            else:
+                for coord in groups[style]:
+                    draw_point(pen, coord, point_size, kind)
@@ -0,0 +1,198 @@
+import threading
+import weakref
+from abc import ABC, abstractmethod
+
+
+
+SCAN_CHUNK = 200  # Glyphs read per run loop pass during the first scan
+
+
+class FontIndex(ABC):
+    '''
+    Font-wide index built from per-glyph contributions.
+
+    Glyphs are only ever read on the main thread: the first scan reads them a chunk
+    per run loop pass, so the app stays responsive, and only combining the
+    contributions happens in the background. After that, the index follows the font's
+    own notifications (glyph_notifications, plus glyphs being added, removed or
+    renamed), so edits from scripts and other windows keep it current too.
+    '''
+
+    # Each subclass keeps its own cache of one index per (defcon) font.
+    _registry = None
+
+    # Glyph notifications that can change a glyph's contribution
+    glyph_notifications = ()
+
+
+    @classmethod
+    def for_font(cls, font):
+        '''Get the cached index for a font, creating it if needed'''
+        if cls._registry is None:
+            cls._registry = weakref.WeakKeyDictionary()
+        naked = font.naked() if hasattr(font, "naked") else font
+        index = cls._registry.get(naked)
+        if index is None:
+            index = cls(naked)
+            cls._registry[naked] = index
+        return index
+
+
+    def __init__(self, font):
+        self.font_ref = weakref.ref(font)
+        self.layer_ref = weakref.ref(font.layers.defaultLayer)
+        self.lock = threading.RLock()
+        self.contributions = {}
+        self.data = self.new_data()  # The combined contributions
+        self.ready = False
+        self.started = False
+        self.generation = 0
+        self.listeners = []
+        self.dirty = set()      # Glyph names to read again
+        self.flush_scheduled = False
+
+
+    def add_listener(self, method):
+        '''Call a bound method (weakly referenced) on the main thread whenever the index changes'''
+        self.listeners = [ref for ref in self.listeners if ref() is not None]
+        if not any(ref() == method for ref in self.listeners):
+            self.listeners.append(weakref.WeakMethod(method))
+
+
+    def start(self):
+        '''Start following the font, and scan it, once'''
+        if self.started:
+            return
+        self.started = True
+        font = self.font_ref()
+        layer = self.layer_ref()
+        if font is None or layer is None:
+            return
+        for notification in self.glyph_notifications:
+            # Any glyph of the font, loaded or not yet
+            font.dispatcher.addObserver(self, "glyphDidChange", notification, None)
+        layer.addObserver(self, "layerGlyphDidChange", "Layer.GlyphAdded")
+        layer.addObserver(self, "layerGlyphDidChange", "Layer.GlyphDeleted")
+        layer.addObserver(self, "layerGlyphNameDidChange", "Layer.GlyphNameChanged")
+        call_soon(self.scan_chunk, list(layer.keys()), {})
+
+
+    def scan_chunk(self, todo, contributions):
+        layer = self.layer_ref()
+        if layer is None:
+            return
+        for glyph_name in todo[:SCAN_CHUNK]:
+            if glyph_name in layer:
+                contributions[glyph_name] = self.contribution(layer[glyph_name])
+        todo = todo[SCAN_CHUNK:]
+        if todo:
+            call_soon(self.scan_chunk, todo, contributions)
+            return
+        threading.Thread(target=self.build, args=(contributions,), name=f"eyeliner.{self.__class__.__name__}", daemon=True).start()
+
+
+    def build(self, contributions):
+        '''Background thread: combine the contributions the scan collected, then swap them in'''
+        # Combining can take a while, so it's done without the lock, which the main thread also takes.
+        data = self.new_data()
+        for contribution in contributions.values():
+            self.combine(data, contribution, 1)
+        with self.lock:
+            self.contributions = contributions
+            self.data = data
+            self.ready = True
+            self.generation += 1
+        call_soon(self.scan_did_finish)
+
+
+    def scan_did_finish(self):
+        # Glyphs that changed during the scan are read again.
+        self.flush()
+        self.notify()
+
+
+    # ==== Font notifications ==== #
+
+    def glyphDidChange(self, notification):
+        glyph = notification.object
+        if glyph.layer is self.layer_ref():
+            self.mark_dirty(glyph.name)
+
+
+    def layerGlyphDidChange(self, notification):
+        self.mark_dirty(notification.data["name"])
+
+
+    def layerGlyphNameDidChange(self, notification):
+        self.mark_dirty(notification.data["oldValue"])
+        self.mark_dirty(notification.data["newValue"])
+
+
+    def mark_dirty(self, glyph_name):
+        # Notifications come in bursts (one per point while dragging), so read the glyph once, a moment later.
+        self.dirty.add(glyph_name)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            call_soon(self.flush_dirty)
+
+
+    def flush_dirty(self):
+        self.flush_scheduled = False
+        if self.flush():
+            self.notify()
+
+
+    def flush(self):
+        '''Main thread: swap the contributions of changed glyphs in and out of the index; return whether it changed'''
+        layer = self.layer_ref()
+        if layer is None or not self.ready:
+            # The end of the scan flushes whatever is left.
+            return False
+        dirty, self.dirty = self.dirty, set()
+        generation = self.generation
+        for glyph_name in dirty:
+            contribution = self.contribution(layer[glyph_name]) if glyph_name in layer else None
+            with self.lock:
+                old = self.contributions.get(glyph_name)
+                if old == contribution:
+                    continue
+                if old is not None:
+                    self.combine(self.data, old, -1)
+                if contribution is None:
+                    del self.contributions[glyph_name]
+                else:
+                    self.contributions[glyph_name] = contribution
+                    self.combine(self.data, contribution, 1)
+                self.generation += 1
+        return self.generation != generation
+
+
+    def notify(self):
+        for ref in self.listeners:
+            method = ref()
+            if method is not None:
+                method()
+
+
+    # ==== Subclass hooks ==== #
+
+    @abstractmethod
+    def new_data(self):
+        '''Return an empty object to combine contributions into'''
+
+
+    @abstractmethod
+    def contribution(self, glyph):
+        '''Return a hashable summary of what a defcon glyph adds to the index'''
+
+
+    @abstractmethod
+    def combine(self, data, contribution, sign):
+        '''Add (sign=1) or subtract (sign=-1) a glyph's contribution to data'''
+
+
+
+def call_soon(func, *args):
+    '''Run func on the main thread, on the next run loop pass'''
+    from PyObjCTools.AppHelper import callAfter
+    callAfter(func, *args)
@@ -0,0 +1,111 @@
+import numpy as np
+from fontTools.misc.fixedTools import otRound
+from fontindex import FontIndex
+
+
+
+MIN_GLYPHS       = 4     # A value must show up in at least this many glyphs...
+MIN_GLYPH_RATIO  = 0.02  # ...and in at least this share of the font's glyphs.
+CLUSTER_RADIUS   = 3     # Values closer than this are treated as one cluster, represented by its peak.
+
+
+class CoordinateHistogram:
+    '''Integer histogram that grows to fit whatever values are added to it'''
+
+    def __init__(self):
+        self.counts = np.zeros(0, dtype=np.int32)
+        self.origin = 0
+
+
+    def add(self, values, sign=1):
+        if not values:
+            return
+        values = np.asarray(values, dtype=np.int64)
+        self.grow(int(values.min()), int(values.max()))
+        # Values are unique per glyph, so fancy-index assignment is safe here.
+        self.counts[values - self.origin] += sign
+
+
+    def grow(self, low, high):
+        if not len(self.counts):
+            self.origin = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int32)
+            return
+        end = self.origin + len(self.counts) - 1
+        if low >= self.origin and high <= end:
+            return
+        new_origin = min(low, self.origin)
+        new_end = max(high, end)
+        counts = np.zeros(new_end - new_origin + 1, dtype=np.int32)
+        start = self.origin - new_origin
+        counts[start:start + len(self.counts)] = self.counts
+        self.counts = counts
+        self.origin = new_origin
+
+
+    def peaks(self, min_count, radius=CLUSTER_RADIUS):
+        '''Values that are the most used within +/- radius and are used at least min_count times'''
+        if not len(self.counts):
+            return frozenset()
+        padded = np.pad(self.counts, radius, constant_values=-1)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1)
+        left = windows[:, :radius].max(axis=1)
+        right = windows[:, radius + 1:].max(axis=1)
+        # Strictly higher than the left side, so a plateau only yields its first value.
+        is_peak = (self.counts >= min_count) & (self.counts > left) & (self.counts >= right)
+        return frozenset(int(v) for v in np.nonzero(is_peak)[0] + self.origin)
+
+
+
+class ImplicitTargets(FontIndex):
+    '''
+    De facto alignment targets of a font: the x and y values that on-curve points
+    land on across many glyphs (stems, bars, serif heights), without being written
+    down as guides or metrics.
+    '''
+
+    _registry = None
+    glyph_notifications = ("Glyph.ContoursChanged",)
+
+    cached_generation = None
+    cached_targets = (frozenset(), frozenset())
+
+
+    def new_data(self):
+        # x histogram, y histogram
+        return CoordinateHistogram(), CoordinateHistogram()
+
+
+    def contribution(self, glyph):
+        # Count each value once per glyph, so a single busy glyph can't make a target.
+        xs, ys = set(), set()
+        for contour in glyph:
+            for point in contour:
+                if point.segmentType is not None:
+                    xs.add(otRound(point.x))
+                    ys.add(otRound(point.y))
+        return tuple(sorted(xs)), tuple(sorted(ys))
+
+
+    def combine(self, data, contribution, sign):
+        xs, ys = contribution
+        x_histogram, y_histogram = data
+        x_histogram.add(xs, sign)
+        y_histogram.add(ys, sign)
+
+
+    def targets(self):
+        '''Return (xs, ys) frozensets of implicit targets, recomputed only after changes'''
+        # Never wait on the lock while the first scan is being combined.
+        if not self.ready:
+            return frozenset(), frozenset()
+        with self.lock:
+            if self.cached_generation != self.generation:
+                min_count = max(MIN_GLYPHS, otRound(len(self.contributions) * MIN_GLYPH_RATIO))
+                x_histogram, y_histogram = self.data
+                self.cached_targets = (
+                    x_histogram.peaks(min_count),
+                    y_histogram.peaks(min_count),
+                    )
+                self.cached_generation = self.generation
+            return self.cached_targets
@@ -1,101 +1,70 @@
-import math
+import time
+import_start = time.perf_counter()
+from timing import timed, record
 from fontTools.misc.fixedTools import otRound
-from fontParts.world import RGlyph
-from fontPens.digestPointPen import DigestPointPen
-from mojo.subscriber import Subscriber, registerGlyphEditorSubscriber, listRegisteredSubscribers
-from mojo.tools import IntersectGlyphWithLine
+from mojo.subscriber import Subscriber, registerGlyphEditorSubscriber, listRegisteredSubscribers, getRegisteredSubscriberEvents, registerSubscriberEvent
 from mojo.UI import CurrentGlyphWindow, getGlyphViewDisplaySettings, getDefault, appearanceColorKey, inDarkMode
-from mojo.pens import DecomposePointPen
-import merz
-from merz.tools.drawingTools import NSImageDrawingTools
-from mojo.extensions import getExtensionDefault
-from defaults import get_flattened_alpha, get_darkened_blue, EXTENSION_KEY, EXTENSION_DEFAULTS
-
-
-
-def eyeliner_symbol(
-        radius      = 5,
-        stretch     = 0.7,
-        strokeColor = (0, 0, 0, 1),
-        strokeWidth = 1,
-        fillColor   = (1, 1, 1, 0)
-        ):
-    # Calculate the width and height
-    width  = radius * 6 * stretch * 2 + strokeWidth * 2
-    height = radius * 2 + strokeWidth * 2
-    # Create a NSImage drawing bot 
-    bot = NSImageDrawingTools((width, height))
-    # Get a pen
-    pen = bot.BezierPath()
-    # Draw the eye
-    pen.moveTo((6 * radius * stretch, 0))
-    pen.curveTo(
-        (2 * radius * stretch, 0),
-        (1.25 * radius * stretch, -radius),
-        (0, -radius))
-    pen.curveTo(
-        (-1.25 * radius * stretch, -radius),
-        (-2 * radius * stretch, 0),
-        (-6 * radius * stretch, 0))
-    pen.curveTo(
-        (-2 * radius * stretch, 0),
-        (-1.25 * radius * stretch, radius),
-        (0, radius))
-    pen.curveTo(
-        (1.25 * radius * stretch, radius),
-        (2 * radius * stretch, 0),
-        (6 * radius * stretch, 0))
-    pen.closePath()
-    bot.fill(*fillColor)
-    bot.stroke(*strokeColor)
-    bot.strokeWidth(strokeWidth)
-    bot.translate(width / 2 + 0.25, height / 2 + 0.25)
-    bot.drawPath(pen)
-    return bot.getImage()
-    
-merz.SymbolImageVendor.registerImageFactory("eyeliner.eye", eyeliner_symbol)
-
-
-def is_on_diagonal(pta, angle, ptb, tol=0.08):
-    if pta == ptb: 
-        return True
-        
-    ar = math.radians(angle)%math.pi
-    ca = math.cos(ar)
-    sa = math.sin(ar)
-    x_diff = ptb[0] - pta[0]
-    y_diff = ptb[1] - pta[1]
-
-    if not math.isclose(ca, 0, abs_tol=tol) and not math.isclose(sa, 0, abs_tol=tol):
-        # Diagonal, distances for x and y should match
-        tdx = x_diff / ca
-        tdy = y_diff / sa
-        return math.isclose(tdx, tdy, abs_tol=5)
-        
-    elif math.isclose(ca, 1, abs_tol=tol) and math.isclose(sa, 0, abs_tol=tol):
-        # Horizontal, so y should match
-        return math.isclose(pta[1], ptb[1], abs_tol=tol)
-        
-    elif math.isclose(ca, 0, abs_tol=tol) and math.isclose(sa, 1, abs_tol=tol):
-        # Vertical, so x should match
-        return math.isclose(pta[0], ptb[0], abs_tol=tol)
-        
-    return False
-
+from mojo.events import postEvent
+from defaults import get_flattened_alpha, get_darkened_blue, load_settings, EXTENSION_KEY
+from drawing import EyeBatch
+from compute import snapshot_glyph, snapshot_bases, get_oncurves, get_line_intersections, get_preview_oncurves, match_points
+from prospective import ProspectivePoints, PROSPECTIVE_EVENT
+from worker import get_worker
+from alignment import FontTargets, GlyphTargets, sort_guidelines, CATEGORY_SETTINGS, FONT_DIMENSION, BLUE, FAMILY_BLUE, MARGIN, IMPLICIT, ANCHOR_MATCH, ANCHOR_MISMATCH
+from results import AlignmentEntry, AlignmentResult, get_result_holder, store_alignment_result, ONCURVE, ANCHOR
+from budget import FrameBudget, DEFAULT_BUDGET_MS
+record("import main.py", import_start)
+
+
+
+ONCURVE_CONTAINER    = "eyeliner.oncurves"
+COMP_CONTAINER       = "eyeliner.components"
+ANCHOR_CONTAINER     = "eyeliner.anchors"
+PREVIEW_CONTAINER    = "eyeliner.preview"  # Prospective points of every tool
+STATUS_CONTAINER     = "eyeliner.status"
+ALIGNMENT_EVENT = f"{EXTENSION_KEY}.eyelinerDidComputeAlignment"
+CONTAINERS = [ONCURVE_CONTAINER, COMP_CONTAINER, ANCHOR_CONTAINER, PREVIEW_CONTAINER]
+# What gets the frame budget first (lowest first)
+PRIORITIES = {
+    ONCURVE_CONTAINER:    0,
+    ANCHOR_CONTAINER:     1,
+    COMP_CONTAINER:       2,
+    PREVIEW_CONTAINER:    3,
+    }
+# Redrawing after a zoom comes after all of the above
+REDRAW_PRIORITY = len(PRIORITIES)
+
+# Prospective points of the tools Eyeliner supports itself
+SLICE_TOOL_POINTS = "eyeliner.sliceTool"
+SHAPE_TOOL_POINTS = "eyeliner.shapeTool"
+OVERLAPPER_POINTS = "eyeliner.overlapper"
+TRANSMUTOR_POINTS = "eyeliner.transmutor"
 
 
 class Eyeliner(Subscriber):
 
 
     def build(self):
+        with timed("Eyeliner.build"):
+            self._build()
+
+
+    def _build(self):
         self.font_dim = []
         self.tool_coords = []
-        self.oncurve_coords = []
-        self.comp_oncurve_coords = []
-        self.trans_coords = []
-        self.overlapper_coords = []
-        self.anc_coords = []
-        self.settings = getExtensionDefault(EXTENSION_KEY, EXTENSION_DEFAULTS)
+        self.slice_line = None
+        self.snapshot = None
+        self.result_holder = {}
+        self.bases = {}
+        self.observed_bases = {}  # base name: the defcon glyph observed for changes
+        self.component_points = None
+        self.prospective = ProspectivePoints()
+        self.worker = get_worker()
+        self.entries = {}  # container: every entry computed for it, shown or not
+        self.point_styles = {}  # container: the point style its entries are drawn with
+        self.awaiting = set()  # containers whose check for the current glyph hasn't delivered yet
+        self.last_result = None
+        self.settings = load_settings()
 
         self.f_guide_xs    = {}
         self.f_guide_ys    = {}
@@ -103,8 +72,15 @@ class Eyeliner(Subscriber):
         self.g_guide_xs    = {}
         self.g_guide_ys    = {}
         self.g_guide_diags = []
-        
-        self.overlapper_color = (0,0,0,1)
+
+        self.implicit = None
+        self.implicit_xs = frozenset()
+        self.implicit_ys = frozenset()
+        self.anchor_index = None
+        self.observed_lib = None
+
+        self.font_targets  = None
+        self.glyph_targets = None
 
         self.slice_tool = None
         self.shape_tool = None
@@ -113,47 +89,37 @@ class Eyeliner(Subscriber):
 
         self.down_point, self.drag_point = (0,0), (0,0)
         self.blue_vals, self.fblue_vals = [], []
+        self.italic_angle, self.slant_offset = 0, 0
 
+        self.budget = FrameBudget(self.settings["frameBudgetField"] or DEFAULT_BUDGET_MS, self.show_partial)
+        self.batch = EyeBatch(self.get_container, self.schedule_redraw)
+        self.status_container = None
         self.update_base_sizes()
-        self.update_blues_display_settings()
-        self.oncurves_on = getGlyphViewDisplaySettings().get('OnCurvePoints')
-        self.anchors_on = getGlyphViewDisplaySettings().get('Anchors')
+        self.update_display_settings()
 
         self.glyph_editor = self.getGlyphEditor()
-        
-        self.oncurve_container = self.glyph_editor.extensionContainer(
-                    identifier="eyeliner.oncurves", 
-                    location="foreground", 
-                    clear=True
-                )
-        self.comp_container = self.glyph_editor.extensionContainer(
-                    identifier="eyeliner.components", 
-                    location="foreground", 
-                    clear=True
-                )
-        self.anchor_container = self.glyph_editor.extensionContainer(
-                    identifier="eyeliner.anchors", 
-                    location="foreground", 
-                    clear=True
-                )
-        self.tool_container = self.glyph_editor.extensionContainer(
-                    identifier="eyeliner.otherTools", 
-                    location="foreground", 
-                    clear=True
-                )
-        self.overlapper_container = self.glyph_editor.extensionContainer(
-                    identifier="eyeliner.overlapperContainer", 
-                    location="foreground", 
-                    clear=True
-                )
-        self.transmutor_container = self.glyph_editor.extensionContainer(
-                    identifier="eyeliner.transmutorContainer", 
-                    location="foreground", 
-                    clear=True
-                )
+        try:
+            self.batch.set_scale(self.glyph_editor.getGlyphView().scale())
+        except:
+            pass
+        # Containers are made by self.batch the first time they have something to draw.
+
+
+    def get_container(self, identifier):
+        with timed("create container"):
+            return self.glyph_editor.extensionContainer(
+                        identifier=identifier, 
+                        location="foreground", 
+                        clear=True
+                    )
         
 
     def started(self):
+        with timed("Eyeliner.started"):
+            self._started()
+
+
+    def _started(self):
         try:
             self.g = self.glyph_editor.getGlyph()
         except:
@@ -169,6 +135,7 @@ class Eyeliner(Subscriber):
         if self.f != None:
             self.update_font_info()
         self.update_color_prefs()
+        self.update_snapshot()
         
         self.check_oncurves()
         self.check_anchors()
@@ -176,16 +143,19 @@ class Eyeliner(Subscriber):
         
         
     def destroy(self):
-        self.oncurve_container.clearSublayers()
-        self.comp_container.clearSublayers()
-        self.anchor_container.clearSublayers()
-        self.tool_container.clearSublayers()
-        self.overlapper_container.clearSublayers()
+        self.observe_font_lib(None)
+        self.observe_bases({})
+        for container in CONTAINERS:
+            self.worker.cancel((id(self), container))
+        self.budget.close()
+        self.batch.clear_all()
+        self.show_partial(False)
         
 
     def update_base_sizes(self):
         self.point_radius = getDefault("glyphViewOnCurvePointsSize")
         self.rad_base = self.point_radius * 1.75  # Changing this value will impact how large the eye is, relative to your on-curve pt size
+        self.batch.set_sizes(self.rad_base, self.point_radius)
 
 
     def update_color_prefs(self):
@@ -199,11 +169,15 @@ class Eyeliner(Subscriber):
         self.col_blues = self.settings[f"blues{colorway}ColorWell"]
         self.col_fblues = self.settings[f"familyBlues{colorway}ColorWell"]
         self.col_margins = self.settings[f"margins{colorway}ColorWell"]
+        self.col_implicit = self.settings[f"implicitTargets{colorway}ColorWell"]
+        self.col_anchors = self.settings[f"anchorConsistency{colorway}ColorWell"]
+        self.col_anchors_off = self.settings[f"anchorMismatch{colorway}ColorWell"]
         
         self.col_component = get_flattened_alpha(getDefault(appearanceColorKey("glyphViewComponentStrokeColor")))
 
         self.col_corner_pt = get_flattened_alpha(getDefault(appearanceColorKey("glyphViewCornerPointsFill")))
         self.col_curve_pt = get_flattened_alpha(getDefault(appearanceColorKey("glyphViewCurvePointsFill")))
+        self.font_targets = None
 
 
     def roboFontDidChangePreferences(self, info):
@@ -212,8 +186,11 @@ class Eyeliner(Subscriber):
         
         
     def eyelinerSettingsDidChange(self, info):
-        self.settings = getExtensionDefault(EXTENSION_KEY, EXTENSION_DEFAULTS)
+        self.settings = load_settings()
+        self.budget.budget_ms = self.settings["frameBudgetField"] or DEFAULT_BUDGET_MS
         self.update_color_prefs()
+        self.update_implicit_info()
+        self.update_anchor_index_info()
         self.check_oncurves()
         self.check_anchors()
         self.check_comp()
@@ -231,29 +208,41 @@ class Eyeliner(Subscriber):
     glyphEditorGlyphDidChangeOutlineDelay = 0
     def glyphEditorGlyphDidChangeOutline(self, info):
         self.g = info["glyph"]
-        self.update_oncurve_info()
+        self.update_snapshot()
         self.check_oncurves()
 
 
     glyphEditorGlyphDidChangeContoursDelay = 0    
     def glyphEditorGlyphDidChangeContours(self, info):
         self.g = info["glyph"]
-        self.update_oncurve_info()
+        self.update_snapshot()
         self.check_oncurves()
 
 
     glyphEditorGlyphDidChangeComponentsDelay = 0
     def glyphEditorGlyphDidChangeComponents(self, info):
         self.g = info["glyph"]
-        self.update_component_info()
+        self.update_snapshot()
+        # Only the components changed, so the base glyphs can be reused.
+        self.update_component_info(reuse_bases=True)
         self.check_comp()
 
 
     glyphEditorGlyphDidChangeAnchorsDelay = 0
     def glyphEditorGlyphDidChangeAnchors(self, info):
         self.g = info["glyph"]
-        self.update_anchor_info()
+        self.update_snapshot()
+        self.check_anchors()
+
+
+    glyphEditorGlyphDidChangeMetricsDelay = 0
+    def glyphEditorGlyphDidChangeMetrics(self, info):
+        '''Margins move with the width, and anchor x offsets are relative to it'''
+        self.g = info["glyph"]
+        self.update_snapshot()
+        self.check_oncurves()
         self.check_anchors()
+        self.check_comp()
 
 
     glyphEditorGlyphDidChangeGuidelinesDelay = 0
@@ -277,29 +266,41 @@ class Eyeliner(Subscriber):
     glyphEditorDidSetGlyphDelay = 0.0001
     def glyphEditorDidSetGlyph(self, info):
         self.g = info["glyph"]
-        # Update on-curves before component info.
-        self.update_oncurve_info()
+        # Nothing computed for the previous glyph may be drawn or published for this one.
+        for container in CONTAINERS:
+            self.worker.cancel((id(self), container))
+            self.budget.cancel(("apply", container))
+        self.entries = {}
+        self.awaiting = set()
+        self.update_snapshot()
         self.update_component_info()
-        self.update_anchor_info()
         self.update_guidelines_info()
         self.update_font_info()
         self.check_oncurves()
         self.check_anchors()
         self.check_comp()
+        # Prospective points belong to the glyph they were submitted for. Cleared after
+        # the checks are requested, so the result isn't published before they deliver.
+        self.prospective.clear()
+        self.clear_container(PREVIEW_CONTAINER)
         
     def glyphEditorDidChangeDisplaySettings(self, info):
-        self.update_blues_display_settings()
-        self.update_oncurve_info()
-        self.update_anchor_info()
-        self.check_oncurves()
-        self.check_anchors()
-        self.check_comp()
+        # The result doesn't depend on what's displayed, so only redraw.
+        self.update_display_settings()
+        for container in CONTAINERS:
+            self.draw_entries(container)
+        
+        
+    def glyphEditorDidScale(self, info):
+        '''Eyes are drawn as paths, so keep them the same size on screen (redrawn within the frame budget)'''
+        self.batch.set_scale(info["scale"])
         
         
     def glyphEditorDidMouseDown(self, info):
         '''Support for slice/shape tool eyes'''
         tool = info['lowLevelEvents'][0]['tool']
         self.tool_coords = []
+        self.slice_line = None
         
         if tool.__class__.__name__ == "SliceTool":
             self.slice_tool_active = True
@@ -323,19 +324,14 @@ class Eyeliner(Subscriber):
         '''Support for slice/shape tool eyes'''
         self.g = info["glyph"]
         self.tool_coords = []
+        self.slice_line = None
         
-        # Slice tool
+        # Slice tool (intersections are found on the worker thread)
         if self.slice_tool_active:
             point = self.slice_tool.sliceDrag
             if point:
                 self.drag_point = (point.x, point.y)
-                slice_line = (self.down_point, self.drag_point)
-                intersects = IntersectGlyphWithLine(self.g, slice_line, canHaveComponent=False, addSideBearings=False)
-                for inter in intersects:
-                    x, y = otRound(inter[0]), otRound(inter[1])
-                    self.tool_coords.append((x,y)) 
-            else:
-                self.tool_coords = []
+                self.slice_line = (self.down_point, self.drag_point)
         # Shape tool
         elif self.shape_tool_active:
             try:
@@ -390,96 +386,86 @@ class Eyeliner(Subscriber):
 
     overlapperDidDrawDelay = 0
     def overlapperDidDraw(self, info):
-        self.overlapper_coords = []
         glyph = info['lowLevelEvents'][0]['overlapGlyph']
-        self.overlapper_color = info['lowLevelEvents'][0]['strokeColor']
+        color = info['lowLevelEvents'][0]['strokeColor']
         if glyph:
-            digest_pen = DigestPointPen()
-            glyph.drawPoints(digest_pen)
-            self.overlapper_coords = [entry[0] for entry in digest_pen.getDigest() if entry[1] != None and type(entry[0]) == tuple and entry[0] not in self.overlapper_coords] 
-            self.overlapper_coords = [(otRound(x), otRound(y)) for (x, y) in self.overlapper_coords if (x, y) not in self.oncurve_coords]
-            self.check_overlapper_points()
+            # Overlapper future points
+            preview, snapshot = snapshot_glyph(glyph), self.snapshot
+            self.set_prospective_points(OVERLAPPER_POINTS, lambda: get_preview_oncurves(preview, snapshot), (color, "rectangle"))
             
             
     def overlapperDidStopDrawing(self, info):
-        self.overlapper_coords = [] 
-        self.check_overlapper_points()
-
-
-    def check_overlapper_points(self):
-        self.overlapper_container.clearSublayers()
-        if self.g == None or CurrentGlyphWindow() != self.glyph_editor:
-            return
-        # Overlapper future points
-        if self.overlapper_coords:
-            for coord in self.overlapper_coords:
-                if self.check_alignment(self.overlapper_container, coord) == True:
-                    self.draw_oncurve_pt(self.overlapper_container, coord, self.overlapper_color, "rectangle")
+        self.set_prospective_points(OVERLAPPER_POINTS, ())
 
 
     transmutorDidDrawDelay = 0
     def transmutorDidDraw(self, info):
-        self.transmutor_coords = []
         offset = info['lowLevelEvents'][0]['offset']
         glyph = info['lowLevelEvents'][0]['transmutorGlyph']
-        self.transmutor_color = info['lowLevelEvents'][0]['color']
+        color = info['lowLevelEvents'][0]['color']
         glyph.moveBy(offset)
         if glyph:
-            digest_pen = DigestPointPen()
-            glyph.drawPoints(digest_pen)
-            self.transmutor_coords = [entry[0] for entry in digest_pen.getDigest() if entry[1] != None and type(entry[0]) == tuple and entry[0] not in self.transmutor_coords] 
-            self.transmutor_coords = [(otRound(x), otRound(y)) for (x, y) in self.transmutor_coords if (x, y) not in self.oncurve_coords]
-            self.check_transmutor_points()
+            # Transmutor future points
+            preview, snapshot = snapshot_glyph(glyph), self.snapshot
+            self.set_prospective_points(TRANSMUTOR_POINTS, lambda: get_preview_oncurves(preview, snapshot), (color, "rectangle"))
             
             
     def transmutorDidStopDrawing(self, info):
-        self.transmutor_coords = [] 
-        self.check_transmutor_points()
+        self.set_prospective_points(TRANSMUTOR_POINTS, ())
 
 
-    def check_transmutor_points(self):
-        self.transmutor_container.clearSublayers()
-        if self.g == None or CurrentGlyphWindow() != self.glyph_editor:
+    def eyelinerDidSubmitProspectivePoints(self, info):
+        '''Any tool can have its prospective points checked (see prospective.py)'''
+        if CurrentGlyphWindow() != self.glyph_editor or info["identifier"] == None:
             return
-        # Tranmutor future points
-        if self.transmutor_coords:
-            for coord in self.transmutor_coords:
-                if self.check_alignment(self.transmutor_container, coord) == True:
-                    self.draw_oncurve_pt(self.transmutor_container, coord, self.transmutor_color, "rectangle")
+        self.set_prospective_points(info["identifier"], info["points"] or (), info["pointStyle"])
 
 
-    def update_component_info(self):
-        if self.g == None:
-            return
-        self.f = self.g.font
-        # Set up a decomposed glyph object
-        self.decomp_glyph = RGlyph()
-        self.decomp_glyph.width = self.g.width
-        decomp_pen = DecomposePointPen(self.f, self.decomp_glyph.getPointPen())
-        self.g.drawPoints(decomp_pen)
-        # Get all on-curve points for the component, and nothing else
-        digest_pen = DigestPointPen()
-        self.decomp_glyph.drawPoints(digest_pen)
-        self.comp_oncurve_coords = [entry[0] for entry in digest_pen.getDigest() if entry[1] != None and type(entry[0]) == tuple and entry[0] not in self.oncurve_coords] 
-
-
-    def update_oncurve_info(self):
-        self.oncurves_on = getGlyphViewDisplaySettings().get('OnCurvePoints')
+    def set_prospective_points(self, identifier, points, point_style=None):
+        if self.prospective.set(identifier, points, point_style):
+            self.check_previews()
+
+
+    def update_snapshot(self):
+        '''Copy the glyph's points, components and anchors, for the compute stage to work from'''
         if self.g == None:
             return
-        # Use a digest point pen to get only on-curves
-        digest_pen = DigestPointPen()
-        self.g.drawPoints(digest_pen)
-        # Get all on-curve points
-        self.oncurve_coords = [entry[0] for entry in digest_pen.getDigest() if entry[1] != None and type(entry[0]) == tuple] 
+        self.snapshot = snapshot_glyph(self.g)
+        # Taken along with the snapshot, so a result computed from it is lost once the glyph changes again.
+        self.result_holder = get_result_holder(self.g)
 
 
-    def update_anchor_info(self):
-        '''Store updated anchor coordinates'''
-        self.anchors_on = getGlyphViewDisplaySettings().get('Anchors')
-        if self.g == None:
+    def update_component_info(self, reuse_bases=False):
+        '''Copy the glyphs that the components use, so they can be decomposed on the worker thread'''
+        if self.g == None or self.snapshot == None:
             return
-        self.anc_coords = [(a.x, a.y) for a in self.g.anchors]
+        self.f = self.g.font
+        self.bases = snapshot_bases(self.f, self.snapshot, self.bases if reuse_bases else None)
+        self.observe_bases(self.bases)
+
+
+    def observe_bases(self, bases):
+        '''Follow the base glyphs, which may be edited in another window, so their snapshots are taken again'''
+        glyphs = {}
+        for base_name in bases:
+            if self.f != None and base_name in self.f:
+                glyphs[base_name] = self.f[base_name].naked()
+        for base_name, glyph in self.observed_bases.items():
+            if glyphs.get(base_name) is not glyph:
+                glyph.removeObserver(self, "Glyph.Changed")
+        for base_name, glyph in glyphs.items():
+            if self.observed_bases.get(base_name) is not glyph:
+                glyph.addObserver(self, "baseGlyphDidChange", "Glyph.Changed")
+        self.observed_bases = glyphs
+
+
+    def baseGlyphDidChange(self, notification):
+        # Reuse every other base's snapshot; only the changed one is taken again.
+        # (A new dict, as the worker thread may still be using the current one.)
+        changed = notification.object.name
+        self.bases = {base_name: base for base_name, base in self.bases.items() if base_name != changed}
+        self.update_component_info(reuse_bases=True)
+        self.check_comp()
 
 
     def update_guidelines_info(self):
@@ -489,34 +475,18 @@ class Eyeliner(Subscriber):
         self.f_guide_ys    = {}
         self.f_guide_diags = []
         if self.f != None:
-            for guideline in self.f.guidelines:
-                if guideline.color:
-                    guide_color = guideline.color
-                else:
-                    guide_color = self.col_glob_guides
-                if guideline.angle in [0, 180]:
-                    self.f_guide_ys[otRound(guideline.y)] = guide_color
-                elif guideline.angle in [90, 270]:
-                    self.f_guide_xs[otRound(guideline.x)] = guide_color
-                else:
-                    self.f_guide_diags.append(((guideline.x, guideline.y), guideline.angle, guide_color))
+            self.f_guide_ys, self.f_guide_xs, self.f_guide_diags = sort_guidelines(
+                [(gl.x, gl.y, gl.angle, gl.color) for gl in self.f.guidelines], 
+                self.col_glob_guides
+                )
 
         # Glyph guidelines
         if self.g != None:
-            self.g_guide_xs    = {}
-            self.g_guide_ys    = {}
-            self.g_guide_diags = []
-            for guideline in self.g.guidelines:
-                if guideline.color:
-                    guide_color = guideline.color
-                else:
-                    guide_color = self.col_loc_guides
-                if guideline.angle in [0, 180]:
-                    self.g_guide_ys[otRound(guideline.y)] = guide_color
-                elif guideline.angle in [90, 270]:
-                    self.g_guide_xs[otRound(guideline.x)] = guide_color
-                else:
-                    self.g_guide_diags.append(((guideline.x, guideline.y), guideline.angle, guide_color))
+            self.g_guide_ys, self.g_guide_xs, self.g_guide_diags = sort_guidelines(
+                [(gl.x, gl.y, gl.angle, gl.color) for gl in self.g.guidelines], 
+                self.col_loc_guides
+                )
+        self.font_targets = None
         
         
     def update_font_info(self):
@@ -526,180 +496,369 @@ class Eyeliner(Subscriber):
             self.f.info.ascender, self.f.info.capHeight
             ]
         
-        # Get blue y's and whether they're set to be displayed
+        # Get blue y's
         self.blue_vals  = self.f.info.postscriptBlueValues + self.f.info.postscriptOtherBlues
         self.fblue_vals = self.f.info.postscriptFamilyBlues + self.f.info.postscriptFamilyOtherBlues
-        self.update_blues_display_settings()
+
+        # Margins follow the italic angle, shifted by RoboFont's italic slant offset
+        self.italic_angle = self.f.info.italicAngle or 0
+        self.slant_offset = self.f.lib.get("com.typemytype.robofont.italicSlantOffset", 0) or 0
+        self.observe_font_lib(self.f)
+        self.font_targets = None
+        self.update_implicit_info()
+        self.update_anchor_index_info()
 
 
-    def update_blues_display_settings(self):
-        self.blues_on  = getGlyphViewDisplaySettings()['Blues']
-        self.fblues_on = getGlyphViewDisplaySettings()['FamilyBlues']
+    def observe_font_lib(self, font):
+        '''The slant offset lives in the font lib, which font info notifications don't cover'''
+        lib = font.naked().lib if font != None else None
+        if lib is self.observed_lib:
+            return
+        if self.observed_lib != None:
+            self.observed_lib.removeObserver(self, "Lib.Changed")
+        if lib != None:
+            lib.addObserver(self, "fontLibDidChange", "Lib.Changed")
+        self.observed_lib = lib
 
 
-    def check_oncurves(self):
+    def fontLibDidChange(self, notification):
+        slant_offset = self.observed_lib.get("com.typemytype.robofont.italicSlantOffset", 0) or 0
+        if slant_offset == self.slant_offset:
+            return
+        self.slant_offset = slant_offset
+        self.font_targets = None
+        self.check_oncurves()
+        self.check_anchors()
+        self.check_comp()
+
+
+    def update_implicit_info(self):
+        '''Fetch the font's implicit targets, which the font's ImplicitTargets index keeps current; return whether they changed'''
+        if self.f == None or not self.settings["showImplicitTargetsCheckbox"]:
+            return self.set_implicit_targets(frozenset(), frozenset())
+        from implicit import ImplicitTargets
+        implicit = ImplicitTargets.for_font(self.f)
+        if implicit is not self.implicit:
+            self.implicit = implicit
+            self.implicit.add_listener(self.implicit_targets_did_update)
+            self.implicit.start()
+        return self.set_implicit_targets(*self.implicit.targets())
+
+
+    def set_implicit_targets(self, xs, ys):
+        if (xs, ys) == (self.implicit_xs, self.implicit_ys):
+            return False
+        self.implicit_xs, self.implicit_ys = xs, ys
+        self.font_targets = None
+        return True
+
+
+    def implicit_targets_did_update(self):
+        '''Called on the main thread when the font's index changed, from this editor or anywhere else'''
+        if self.update_implicit_info():
+            self.check_oncurves()
+            self.check_anchors()
+            self.check_comp()
+
+
+    def update_anchor_index_info(self):
+        '''Start the font's anchor index, which keeps itself current from the font's anchor notifications'''
+        if self.f == None or not self.settings["showAnchorConsistencyCheckbox"]:
+            return
+        from anchorindex import AnchorIndex
+        anchor_index = AnchorIndex.for_font(self.f)
+        if anchor_index is not self.anchor_index:
+            self.anchor_index = anchor_index
+            self.anchor_index.add_listener(self.anchor_index_did_update)
+            self.anchor_index.start()
+
+
+    def anchor_index_did_update(self):
+        '''Called on the main thread when any glyph's anchors (or width) changed, here or anywhere else'''
+        self.check_anchors()
+
+
+    def update_display_settings(self):
+        display_settings = getGlyphViewDisplaySettings()
+        self.oncurves_on = display_settings.get('OnCurvePoints')
+        self.anchors_on  = display_settings.get('Anchors')
+        self.blues_on    = display_settings['Blues']
+        self.fblues_on   = display_settings['FamilyBlues']
+
+
+    def get_targets(self):
+        '''The current glyph's alignment targets, rebuilt only when something they depend on changed'''
+        if self.font_targets == None:
+            # Every category is matched, for the published result; is_shown() decides what gets drawn.
+            self.font_targets = FontTargets(
+                font_dims    = self.font_dim,
+                blues        = self.blue_vals,
+                family_blues = self.fblue_vals,
+                guide_ys     = self.f_guide_ys,
+                guide_xs     = self.f_guide_xs,
+                guide_diags  = self.f_guide_diags,
+                implicit_xs  = self.implicit_xs,
+                implicit_ys  = self.implicit_ys,
+                colors       = {
+                    FONT_DIMENSION: self.col_font_dim,
+                    BLUE:           self.col_blues,
+                    FAMILY_BLUE:    self.col_fblues,
+                    MARGIN:         self.col_margins,
+                    IMPLICIT:       self.col_implicit,
+                    },
+                italic_angle = self.italic_angle,
+                slant_offset = self.slant_offset,
+                slant_vertical_guides = self.settings["slantVerticalGuidesCheckbox"],
+                )
+            self.glyph_targets = None
+        if self.glyph_targets == None or self.glyph_targets.width != self.g.width:
+            self.glyph_targets = GlyphTargets(self.font_targets, self.g.width, self.g_guide_ys, self.g_guide_xs, self.g_guide_diags)
+        return self.glyph_targets
+
+
+    def govern(self, container, stage, func):
+        '''Run func within the frame budget, after the work for more important containers'''
+        if stage == "check":
+            # The glyph's result is published once this container delivers too.
+            self.awaiting.add(container)
+        self.budget.request((stage, container), PRIORITIES[container], func)
+
+
+    def schedule_redraw(self, container, func):
+        '''Redraw a container at a new scale once checking is done, a frame budget at a time; zooming further replaces it'''
+        self.budget.request(("redraw", container), REDRAW_PRIORITY + PRIORITIES.get(container, 0), func)
+
+
+    def submit(self, container, job, point_style=None):
+        '''
+        Run job, which returns AlignmentEntries, on the worker thread, and draw its result
+        unless a newer job replaced it. With a point_style (color, shape), matched points get a point marker too;
+        point_style may also be a function that returns the style for a point.
+        '''
+        key = (id(self), container)
+        def apply(entries):
+            # Drawing waits its turn in the frame budget, and is dropped if a newer job came in meanwhile.
+            if self.worker.is_current(key, generation):
+                self.apply_entries(container, entries, point_style)
+        generation = self.worker.submit(key, job, lambda entries: self.govern(container, "apply", lambda: apply(entries)))
+
+
+    def clear_container(self, container):
+        self.worker.cancel((id(self), container))
+        self.budget.cancel(("apply", container))
+        self.apply_entries(container, ())
+
+
+    def show_partial(self, partial):
+        '''A subtle note under the glyph while some eyes are waiting for idle time'''
+        if self.status_container != None:
+            self.status_container.clearSublayers()
+        if not partial or self.g == None:
+            return
+        if self.status_container == None:
+            self.status_container = self.get_container(STATUS_CONTAINER)
+        descender = self.f.info.descender if self.f != None else None
+        self.status_container.appendTextLineSublayer(
+            position=(0, descender or 0),
+            offset=(0, -8),
+            text="Eyeliner: partial",
+            pointSize=9,
+            fillColor=(0.5, 0.5, 0.5, 0.6),
+            horizontalAlignment="left",
+            verticalAlignment="top",
+            )
+
+
+    def apply_entries(self, container, entries, point_style=None):
+        '''Main thread: keep a container's computed entries, draw the ones that are shown, and publish once every container delivered'''
+        self.entries[container] = tuple(entries)
+        self.point_styles[container] = point_style
+        self.awaiting.discard(container)
+        self.draw_entries(container)
+        if not self.awaiting:
+            self.publish_result()
+
+
+    def is_shown(self, entry):
+        '''Whether an entry gets drawn, given the settings and the glyph view's display settings'''
+        if entry.source == ONCURVE and self.oncurves_on is not True:
+            return False
+        if entry.source == ANCHOR and self.anchors_on is not True:
+            return False
+        if entry.category == BLUE and self.blues_on is not True:
+            return False
+        if entry.category == FAMILY_BLUE and self.fblues_on is not True:
+            return False
+        if entry.category in (ANCHOR_MATCH, ANCHOR_MISMATCH):
+            return bool(self.settings["showAnchorConsistencyCheckbox"])
+        if entry.category in CATEGORY_SETTINGS:
+            return bool(self.settings[CATEGORY_SETTINGS[entry.category]])
+        return True
+
+
+    def draw_entries(self, container):
+        '''Hand a container's shown eyes to the batch, which updates only what changed'''
+        point_style = self.point_styles.get(container)
+        self.batch.begin(container)
+        marked = set()
+        for entry in self.entries.get(container, ()):
+            if not self.is_shown(entry):
+                continue
+            self.draw_eye(container, entry.point, entry.color, entry.angle)
+            style = point_style(entry.point) if callable(point_style) else point_style
+            if style != None and entry.point not in marked:
+                marked.add(entry.point)
+                self.draw_oncurve_pt(container, entry.point, *style)
+        self.batch.flush(container)
+
+
+    def publish_result(self):
+        '''Share the glyph's combined result with other extensions, when it changed'''
         if self.g == None:
             return
-        self.oncurve_container.clearSublayers()
-        # On-curve points
-        if self.oncurves_on is True:
-            for coord in self.oncurve_coords:
-                self.check_alignment(self.oncurve_container, coord)
+        entries = tuple(entry for container in CONTAINERS for entry in self.entries.get(container, ()))
+        result = AlignmentResult(self.g.name, self.g.layer.name, entries)
+        # Stored even when unchanged, as the glyph may have changed in ways that don't affect it.
+        store_alignment_result(self.result_holder, result)
+        if result == self.last_result:
+            return
+        self.last_result = result
+        postEvent(ALIGNMENT_EVENT, glyph=self.g, result=result)
+
+
+    def check_oncurves(self):
+        self.govern(ONCURVE_CONTAINER, "check", self._check_oncurves)
+
+
+    def _check_oncurves(self):
+        if self.g == None or self.snapshot == None:
+            return
+        # On-curve points, checked even while hidden, for the published result
+        snapshot, targets = self.snapshot, self.get_targets()
+        self.submit(ONCURVE_CONTAINER, lambda: match_points(targets, get_oncurves(snapshot), ONCURVE))
 
                      
-    def check_anchors(self):   
-        if self.g == None:
+    def check_anchors(self):
+        self.govern(ANCHOR_CONTAINER, "check", self._check_anchors)
+
+
+    def _check_anchors(self):
+        if self.g == None or self.snapshot == None:
             return
-        self.anchor_container.clearSublayers()
-        # Anchors
-        if self.anchors_on is True:
-            for coord in self.anc_coords:
-                self.check_alignment(self.anchor_container, coord)
+        # Anchors, checked even while hidden, for the published result
+        snapshot, targets = self.snapshot, self.get_targets()
+        anchor_index = self.anchor_index
+        col_anchors, col_anchors_off = self.col_anchors, self.col_anchors_off
+        def job():
+            entries = []
+            for name, x, y in snapshot.anchors:
+                entries += match_points(targets, [(x, y)], ANCHOR)
+                # Compare against same-named anchors in the rest of the font
+                if anchor_index != None:
+                    for angle, matched, dominant in anchor_index.check(name, snapshot.name, (x, y), snapshot.width):
+                        if matched:
+                            entries.append(AlignmentEntry((x, y), ANCHOR, ANCHOR_MATCH, dominant, angle, col_anchors))
+                        else:
+                            entries.append(AlignmentEntry((x, y), ANCHOR, ANCHOR_MISMATCH, dominant, angle, col_anchors_off))
+            return entries
+        self.submit(ANCHOR_CONTAINER, job)
 
                 
     def check_tool_points(self):
-        if self.g == None or CurrentGlyphWindow() != self.glyph_editor:
-            return
-        self.tool_container.clearSublayers()
+        '''Turn the Slice Tool's line and the shape tool's shape into prospective points'''
         # Slice tool intersections
-        if self.slice_tool_active:
-            for coord in self.tool_coords:
-                self.check_alignment(self.tool_container, coord)
+        if self.slice_tool_active and self.slice_line != None and self.snapshot != None:
+            snapshot, line = self.snapshot, self.slice_line
+            self.set_prospective_points(SLICE_TOOL_POINTS, lambda: get_line_intersections(snapshot, line))
+        else:
+            self.set_prospective_points(SLICE_TOOL_POINTS, ())
         # Shape tool future points
-        elif self.shape_tool_active:
-            for coord in self.tool_coords:
-                if self.check_alignment(self.tool_container, coord) == True:
-                    self.draw_oncurve_pt(self.tool_container, coord, self.shape_pt_color, self.shape_pt_shape)
-                
+        if self.shape_tool_active and self.tool_coords:
+            self.set_prospective_points(SHAPE_TOOL_POINTS, self.tool_coords, (self.shape_pt_color, self.shape_pt_shape))
+        else:
+            self.set_prospective_points(SHAPE_TOOL_POINTS, ())
 
-    def check_comp(self):
-        if self.g == None:
+
+    def check_previews(self):
+        self.govern(PREVIEW_CONTAINER, "check", self._check_previews)
+
+
+    def _check_previews(self):
+        batches = self.prospective.current()
+        if self.g == None or CurrentGlyphWindow() != self.glyph_editor or not batches:
+            self.clear_container(PREVIEW_CONTAINER)
             return
-        self.comp_container.clearSublayers()
-        # Component points
-        for coord in self.comp_oncurve_coords:
-            if self.check_alignment(self.comp_container, coord) == True:
-                self.draw_oncurve_pt(self.comp_container, coord, self.col_component, "oval")
+        # Every tool's points go in one container; batches that didn't change aren't matched again.
+        prospective, targets, point_styles = self.prospective, self.get_targets(), {}
+        self.submit(PREVIEW_CONTAINER, lambda: prospective.match(batches, targets, point_styles), point_styles.get)
                 
-                
-    def check_alignment(self, container, coord):
-        alignment_match = False
-        x, y = coord[0], coord[1]
 
-        if self.g != None:
+    def check_comp(self):
+        self.govern(COMP_CONTAINER, "check", self._check_comp)
 
-            angle = 0
-            color = None
-
-            # ==== HORIZONTAL STUFF ==== #
-            # Global horizontal guides
-            if otRound(y) in self.f_guide_ys.keys():
-                color = self.f_guide_ys[otRound(y)]
-                if self.settings["showGlobalGuidesCheckbox"]:
-                    self.draw_eye(container, coord, color, angle)
-                    alignment_match = True
-
-            # Local horizontal guides
-            elif otRound(y) in self.g_guide_ys.keys():
-                color = self.g_guide_ys[otRound(y)]
-                if self.settings["showLocalGuidesCheckbox"]:
-                    self.draw_eye(container, coord, color, angle)
-                    alignment_match = True
-
-            # Font dimensions
-            elif otRound(y) in self.font_dim:                
-                color = self.col_font_dim
-                if self.settings["showFontDimensionsCheckbox"]:
-                    self.draw_eye(container, coord, color, angle)
-                    alignment_match = True
-
-            # Blues
-            elif otRound(y) in self.blue_vals:
-                if self.blues_on is True:
-                    color = self.col_blues
-                    if self.settings["showBluesCheckbox"]:
-                        self.draw_eye(container, coord, color, angle)
-                        alignment_match = True
-
-            # Family blues
-            elif otRound(y) in self.fblue_vals:
-                if self.fblues_on is True:
-                    color = self.col_fblues
-                    if self.settings["showFamilyBluesCheckbox"]:
-                        self.draw_eye(container, coord, color, angle)
-                        alignment_match = True
-
-            # ==== VERTICAL STUFF ==== #
-            angle = 90
-            # Global vertical guides
-            if otRound(x) in self.f_guide_xs.keys():
-                color = self.f_guide_xs[otRound(x)]
-                if self.settings["showGlobalGuidesCheckbox"]:
-                    self.draw_eye(container, coord, color, angle)
-                    alignment_match = True
-
-            # Local vertical guides
-            elif otRound(x) in self.g_guide_xs.keys():
-                color = self.g_guide_xs[otRound(x)]
-                if self.settings["showLocalGuidesCheckbox"]:
-                    self.draw_eye(container, coord, color, angle)
-                    alignment_match = True
-                
-            # Margins
-            elif otRound(x) in [0, self.g.width]:
-                color = self.col_margins
-                if self.settings["showMarginsCheckbox"]:
-                    self.draw_eye(container, coord, color, angle)
-                    alignment_match = True
-
-            # ==== DIAGONAL STUFF ==== #
-            for gd_info in self.g_guide_diags:
-                angle, color = gd_info[1], gd_info[2]
-                result = is_on_diagonal(gd_info[0], angle, (x, y))
-                if result:
-                    ## Tested code to clean up the diagonal eye presentation
-                    # diag_x, diag_y = get_diagonal_xy((gd.x, gd.y), angle, (x, y))  # Try to avoid the eye looking disjointed from the guide.
-                    if self.settings["showLocalGuidesCheckbox"]:
-                        self.draw_eye(container, coord, color, angle)
-                        alignment_match = True
-                    
-            for gd_info in self.f_guide_diags:
-                angle, color = gd_info[1], gd_info[2]
-                result = is_on_diagonal(gd_info[0], angle, (x, y))
-                if result:
-                    ## Tested code to clean up the diagonal eye presentation
-                    # diag_x, diag_y = get_diagonal_xy((gd.x, gd.y), angle, (x, y))  # Try to avoid the eye looking disjointed from the guide.
-                    if self.settings["showGlobalGuidesCheckbox"]:
-                        self.draw_eye(container, coord, color, angle)
-                        alignment_match = True
-                    
-        return alignment_match
+
+    def _check_comp(self):
+        if self.g == None or self.snapshot == None:
+            return
+        # Component points
+        if not self.snapshot.components:
+            self.clear_container(COMP_CONTAINER)
+            return
+        if self.component_points == None:
+            from components import ComponentPoints
+            self.component_points = ComponentPoints()
+        # Only the components that moved or were transformed since the last check get matched again.
+        snapshot, bases, targets, component_points = self.snapshot, self.bases, self.get_targets(), self.component_points
+        style = (self.col_component, "oval")
+        self.submit(COMP_CONTAINER, lambda: component_points.match(snapshot, bases, targets), style)
                 
                 
     def draw_eye(self, container, coord, color, angle):
-        eye = container.appendSymbolSublayer(
-                position      = (coord[0], coord[1]),
-                rotation      = angle,
-                imageSettings = dict(
-                                    name        = "eyeliner.eye",
-                                    radius      = self.rad_base, 
-                                    strokeColor = color,
-                                    fillColor   = (1,1,1,0)  # self.fill_color
-                                    )
-                )
+        self.batch.add_eye(container, (coord[0], coord[1]), color, angle)
                 
                 
     def draw_oncurve_pt(self, container, coord, color, shape):
-        component_point  = container.appendSymbolSublayer(
-                position = (coord[0], coord[1])
-                )
-        component_point.setImageSettings(
-                dict(
-                    name      = shape,
-                    size      = (otRound(self.point_radius*2), otRound(self.point_radius*2)),
-                    fillColor = tuple(color)
-                )
-            )
+        self.batch.add_point(container, (coord[0], coord[1]), color, shape)
         
         
+def alignment_event_extractor(subscriber, info):
+    attributes = info["lowLevelEvents"][-1]
+    info["glyph"] = attributes.get("glyph")
+    info["result"] = attributes.get("result")
+
+
+def prospective_event_extractor(subscriber, info):
+    attributes = info["lowLevelEvents"][-1]
+    info["identifier"] = attributes.get("identifier")
+    info["points"] = attributes.get("points")
+    info["pointStyle"] = attributes.get("pointStyle")
+
+
+register_start = time.perf_counter()
+# Let other extensions subscribe to Eyeliner's results
+if ALIGNMENT_EVENT not in getRegisteredSubscriberEvents():
+    registerSubscriberEvent(
+        subscriberEventName=ALIGNMENT_EVENT,
+        methodName="eyelinerDidComputeAlignment",
+        lowLevelEventNames=[ALIGNMENT_EVENT],
+        eventInfoExtractionFunction=alignment_event_extractor,
+        dispatcher="roboFont",
+        documentation="Sent when Eyeliner has computed the alignment of a glyph. info['result'] is an immutable AlignmentResult (see results.py).",
+        delay=None
+    )
+# Let any tool have its prospective points checked
+if PROSPECTIVE_EVENT not in getRegisteredSubscriberEvents():
+    registerSubscriberEvent(
+        subscriberEventName=PROSPECTIVE_EVENT,
+        methodName="eyelinerDidSubmitProspectivePoints",
+        lowLevelEventNames=[PROSPECTIVE_EVENT],
+        eventInfoExtractionFunction=prospective_event_extractor,
+        dispatcher="roboFont",
+        documentation="Posted by a tool to have Eyeliner check its prospective points: info['identifier'], info['points'] and info['pointStyle'] (see prospective.py).",
+        delay=None
+    )
 registerGlyphEditorSubscriber(Eyeliner)
+# Space Center and Font Overview, when turned on in the settings
+from overview import EyelinerOverview
+eyeliner_overview = EyelinerOverview()
+record("register subscriber", register_start)
@@ -0,0 +1,273 @@
+'''
+Eyeliner outside of the glyph editor: eyes in Space Center, and counts in Font Overview cells.
+
+Both are turned on in the settings. Every glyph of a font is matched against the same
+FontTargets, and its result is kept as a defcon representation, so a glyph is only checked
+when it's first drawn (that is, scrolled into view) and again after it changes.
+'''
+
+import weakref
+from mojo.events import addObserver, removeObserver
+from mojo.extensions import getExtensionDefault
+from mojo.UI import getDefault, appearanceColorKey, inDarkMode
+from defaults import get_flattened_alpha, load_settings, EXTENSION_KEY
+from alignment import FontTargets, GlyphTargets, sort_guidelines, CATEGORY_SETTINGS, FONT_DIMENSION, BLUE, FAMILY_BLUE, MARGIN, IMPLICIT
+from compute import snapshot_glyph, snapshot_bases, get_oncurves, get_component_oncurves, match_points
+from results import ONCURVE, ANCHOR, COMPONENT
+
+
+
+REPRESENTATION = "com.ryanbugden.eyeliner.alignmentEntries"
+SETTINGS_EVENT = f"{EXTENSION_KEY}.eyelinerSettingsDidChange"
+
+EYE_RADIUS = 3       # In screen points
+COUNT_SIZE = 9       # Font size of the counts in Font Overview cells
+COUNT_COLOR = (0.5, 0.5, 0.5, 1)
+
+
+def naked(obj):
+    return obj.naked() if hasattr(obj, "naked") else obj
+
+
+def alignment_entries_factory(glyph):
+    return BatchEngine.for_font(glyph.font).compute(glyph)
+
+
+_factory_registered = False
+
+
+def get_alignment_entries(glyph):
+    '''A glyph's AlignmentEntries, computed the first time they're asked for after the glyph changed'''
+    global _factory_registered
+    glyph = naked(glyph)
+    if glyph.font is None:
+        return ()
+    if not _factory_registered:
+        from defcon import Glyph, registerRepresentationFactory
+        registerRepresentationFactory(Glyph, REPRESENTATION, alignment_entries_factory)
+        _factory_registered = True
+    BatchEngine.for_font(glyph.font).computed.add(glyph)
+    return glyph.getRepresentation(REPRESENTATION)
+
+
+
+class BatchEngine:
+    '''
+    Checks the glyphs of one font against one shared set of font-level targets.
+    Glyphs without their own guidelines share a GlyphTargets per width.
+    '''
+
+    _registry = None
+
+
+    @classmethod
+    def for_font(cls, font):
+        '''Get the cached engine for a (defcon) font, creating it if needed'''
+        if cls._registry is None:
+            cls._registry = weakref.WeakKeyDictionary()
+        font = naked(font)
+        engine = cls._registry.get(font)
+        if engine is None:
+            engine = cls(font)
+            cls._registry[font] = engine
+        return engine
+
+
+    @classmethod
+    def invalidate_all(cls):
+        for engine in list((cls._registry or {}).values()):
+            engine.invalidate()
+
+
+    def __init__(self, font):
+        self.font_ref = weakref.ref(font)
+        self.font_targets = None
+        self.glyph_targets = {}  # width: GlyphTargets
+        self.computed = weakref.WeakSet()  # Glyphs that hold a result
+        self.implicit = None
+        self.slant_offset = 0
+        font.info.addObserver(self, "fontDidChange", "Info.Changed")
+        font.addObserver(self, "fontDidChange", "Font.GuidelinesChanged")
+        font.lib.addObserver(self, "libDidChange", "Lib.Changed")
+
+
+    def fontDidChange(self, notification):
+        self.invalidate()
+
+
+    def libDidChange(self, notification):
+        # Only the slant offset matters here.
+        font = self.font_ref()
+        if self.font_targets is not None and font is not None:
+            slant_offset = font.lib.get("com.typemytype.robofont.italicSlantOffset", 0) or 0
+            if slant_offset != self.slant_offset:
+                self.invalidate()
+
+
+    def invalidate(self):
+        '''Throw away the targets and every glyph's result'''
+        self.font_targets = None
+        self.glyph_targets = {}
+        for glyph in list(self.computed):
+            glyph.destroyRepresentation(REPRESENTATION)
+        self.computed = weakref.WeakSet()
+
+
+    def implicit_targets_did_update(self):
+        self.invalidate()
+        refresh_views()
+
+
+    def get_font_targets(self):
+        if self.font_targets is None:
+            self.font_targets = self.build_font_targets()
+        return self.font_targets
+
+
+    def build_font_targets(self):
+        font = self.font_ref()
+        info = font.info
+        settings = load_settings()
+        colorway = "Dark" if inDarkMode() else "Light"
+        self.slant_offset = font.lib.get("com.typemytype.robofont.italicSlantOffset", 0) or 0
+        guide_ys, guide_xs, guide_diags = sort_guidelines(
+            [(gl.x, gl.y, gl.angle, tuple(gl.color) if gl.color else None) for gl in font.guidelines],
+            get_flattened_alpha(getDefault(appearanceColorKey("glyphViewGlobalGuidesColor")))
+            )
+        implicit_xs, implicit_ys = frozenset(), frozenset()
+        if settings["showImplicitTargetsCheckbox"]:
+            from implicit import ImplicitTargets
+            self.implicit = ImplicitTargets.for_font(font)
+            self.implicit.add_listener(self.implicit_targets_did_update)
+            self.implicit.start()
+            implicit_xs, implicit_ys = self.implicit.targets()
+        return FontTargets(
+            font_dims    = [info.descender, 0, info.xHeight, info.ascender, info.capHeight],
+            blues        = (info.postscriptBlueValues or []) + (info.postscriptOtherBlues or []),
+            family_blues = (info.postscriptFamilyBlues or []) + (info.postscriptFamilyOtherBlues or []),
+            guide_ys     = guide_ys,
+            guide_xs     = guide_xs,
+            guide_diags  = guide_diags,
+            implicit_xs  = implicit_xs,
+            implicit_ys  = implicit_ys,
+            enabled      = {category: settings[key] for category, key in CATEGORY_SETTINGS.items()},
+            colors       = {
+                FONT_DIMENSION: settings[f"fontDimensions{colorway}ColorWell"],
+                BLUE:           settings[f"blues{colorway}ColorWell"],
+                FAMILY_BLUE:    settings[f"familyBlues{colorway}ColorWell"],
+                MARGIN:         settings[f"margins{colorway}ColorWell"],
+                IMPLICIT:       settings[f"implicitTargets{colorway}ColorWell"],
+                },
+            italic_angle = info.italicAngle or 0,
+            slant_offset = self.slant_offset,
+            slant_vertical_guides = settings["slantVerticalGuidesCheckbox"],
+            )
+
+
+    def get_glyph_targets(self, glyph):
+        font_targets = self.get_font_targets()
+        if glyph.guidelines:
+            guide_ys, guide_xs, guide_diags = sort_guidelines(
+                [(gl.x, gl.y, gl.angle, tuple(gl.color) if gl.color else None) for gl in glyph.guidelines],
+                get_flattened_alpha(getDefault(appearanceColorKey("glyphViewLocalGuidesColor")))
+                )
+            return GlyphTargets(font_targets, glyph.width, guide_ys, guide_xs, guide_diags)
+        if glyph.width not in self.glyph_targets:
+            self.glyph_targets[glyph.width] = GlyphTargets(font_targets, glyph.width)
+        return self.glyph_targets[glyph.width]
+
+
+    def compute(self, glyph):
+        '''All of a (defcon) glyph's AlignmentEntries: on-curves, anchors and components'''
+        targets = self.get_glyph_targets(glyph)
+        snapshot = snapshot_glyph(glyph)
+        oncurves = get_oncurves(snapshot)
+        entries = match_points(targets, oncurves, ONCURVE)
+        entries += match_points(targets, [(x, y) for name, x, y in snapshot.anchors], ANCHOR)
+        if snapshot.components:
+            existing = set(oncurves)
+            bases = snapshot_bases(glyph.layer, snapshot)
+            coords = [pt for pt in get_component_oncurves(snapshot, bases) if pt not in existing]
+            entries += match_points(targets, coords, COMPONENT)
+        return tuple(entries)
+
+
+
+def refresh_views():
+    from mojo.UI import AllSpaceCenters, AllFontWindows
+    for space_center in AllSpaceCenters():
+        try:
+            space_center.updateGlyphLineView()
+        except:
+            pass
+    for font_window in AllFontWindows():
+        try:
+            font_window.getGlyphCollection().getGlyphCellView().setNeedsDisplay_(True)
+        except:
+            pass
+
+
+
+class EyelinerOverview:
+    '''Draws into Space Center and Font Overview cells, when the settings ask for it'''
+
+    def __init__(self):
+        self.observing = set()
+        addObserver(self, "settingsDidChange", SETTINGS_EVENT)
+        self.update_observers()
+
+
+    def update_observers(self):
+        # Only these two settings, so starting up doesn't need all of the defaults (and their color lookups).
+        stored = getExtensionDefault(EXTENSION_KEY, fallback={})
+        wanted = set()
+        if stored.get("showInSpaceCenterCheckbox", False):
+            wanted.add(("spaceCenterDrawEyes", "spaceCenterDraw"))
+        if stored.get("showInFontOverviewCheckbox", False):
+            wanted.add(("glyphCellDrawCount", "glyphCellDraw"))
+        for method_name, event in self.observing - wanted:
+            removeObserver(self, event)
+        for method_name, event in wanted - self.observing:
+            addObserver(self, method_name, event)
+        self.observing = wanted
+
+
+    def settingsDidChange(self, info):
+        self.update_observers()
+        # Colors and categories may have changed.
+        BatchEngine.invalidate_all()
+        refresh_views()
+
+
+    def spaceCenterDrawEyes(self, info):
+        import mojo.drawingTools as ctx
+        from drawing import draw_eye
+        glyph = info["glyph"]
+        radius = EYE_RADIUS / info["scale"]
+        ctx.save()
+        # Outlined, like in the glyph editor
+        ctx.fill(None)
+        ctx.strokeWidth(1 / info["scale"])
+        # The drawing tools module works as a pen.
+        for entry in get_alignment_entries(glyph):
+            ctx.stroke(*entry.color)
+            ctx.newPath()
+            draw_eye(ctx, entry.point, radius, entry.angle)
+            ctx.drawPath()
+        ctx.restore()
+
+
+    def glyphCellDrawCount(self, info):
+        import mojo.drawingTools as ctx
+        glyph = info["glyph"]
+        count = len({entry.point for entry in get_alignment_entries(glyph)})
+        if not count:
+            return
+        cell = info.get("cell")
+        width = info.get("width") or getattr(cell, "width", 0)
+        height = info.get("height") or getattr(cell, "height", 0)
+        ctx.save()
+        ctx.fill(*COUNT_COLOR)
+        ctx.fontSize(COUNT_SIZE)
+        ctx.text(str(count), (width - 3, height - COUNT_SIZE - 3), align="right")
+        ctx.restore()
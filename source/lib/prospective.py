@@ -0,0 +1,93 @@
+'''
+Prospective points: points that a tool is about to make, checked by Eyeliner before they exist.
+
+Any tool can submit a batch of points for the current glyph editor, under an identifier
+of its own. A newer batch under the same identifier replaces the last one, and an empty
+batch takes it away. Points that align get eyes, and with a point style (color, shape),
+a ghost point too:
+
+    from prospective import submit_prospective_points, clear_prospective_points
+    submit_prospective_points("com.me.myTool", [(100, 0), (100, 500)], ((1, 0, 0, 1), "oval"))
+    clear_prospective_points("com.me.myTool")
+
+The same can be done by posting the event directly, with identifier, points and pointStyle:
+
+    postEvent("com.ryanbugden.eyeliner.settings.eyelinerSubmitProspectivePoints", identifier=..., points=..., pointStyle=...)
+'''
+
+from defaults import EXTENSION_KEY
+from compute import match_points
+from results import TOOL_PREVIEW
+
+
+
+PROSPECTIVE_EVENT = f"{EXTENSION_KEY}.eyelinerSubmitProspectivePoints"
+
+
+def submit_prospective_points(identifier, points, point_style=None):
+    '''Have Eyeliner check a batch of (x, y) points, replacing the tool's previous batch'''
+    from mojo.events import postEvent
+    postEvent(PROSPECTIVE_EVENT, identifier=identifier, points=tuple(tuple(pt) for pt in points), pointStyle=point_style)
+
+
+def clear_prospective_points(identifier):
+    submit_prospective_points(identifier, ())
+
+
+
+class ProspectivePoints:
+    '''
+    The batches of prospective points in one glyph editor, by identifier.
+
+    Within Eyeliner, a batch's points may also be a function that returns them,
+    so deriving them from a preview glyph happens on the worker thread.
+    A batch of plain points is only matched again when its points or the targets change.
+    '''
+
+    def __init__(self):
+        self.batches = {}  # identifier: (points, point style)
+        self.matched = {}  # identifier: (points, targets, entries), only used on the worker thread
+
+
+    def set(self, identifier, points, point_style=None):
+        '''Replace a batch; return whether anything changed'''
+        if not callable(points):
+            # Points may come as lists (or ints); the batch is compared, and its points used as keys.
+            points = tuple((float(x), float(y)) for x, y in points)
+        if point_style is not None:
+            color, shape = point_style
+            point_style = (tuple(float(value) for value in color), shape)
+        if not points:
+            return self.batches.pop(identifier, None) is not None
+        batch = (points, point_style)
+        if self.batches.get(identifier) == batch and not callable(points):
+            return False
+        self.batches[identifier] = batch
+        return True
+
+
+    def clear(self):
+        self.batches = {}
+
+
+    def current(self):
+        return dict(self.batches)
+
+
+    def match(self, batches, targets, point_styles):
+        '''Worker thread: AlignmentEntries for every batch, filling point_styles with each matched point's style'''
+        matched = {}
+        entries = []
+        for identifier, (points, point_style) in batches.items():
+            cached = self.matched.get(identifier)
+            if cached is not None and not callable(points) and cached[0] == points and cached[1] is targets:
+                batch_entries = cached[2]
+            else:
+                batch_entries = match_points(targets, points() if callable(points) else points, TOOL_PREVIEW)
+            matched[identifier] = (points, targets, batch_entries)
+            entries += batch_entries
+            if point_style is not None:
+                for entry in batch_entries:
+                    point_styles.setdefault(entry.point, point_style)
+        self.matched = matched
+        return entries
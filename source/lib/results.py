@@ -0,0 +1,67 @@
+'''
+Eyeliner's computed alignment results, shared with other extensions.
+
+Every time Eyeliner finishes checking a glyph, it posts the
+"com.ryanbugden.eyeliner.settings.eyelinerDidComputeAlignment" subscriber
+event, with info["glyph"] and info["result"]. To get a glyph's result at
+any time instead (None if the glyph changed since it was checked):
+
+    from results import get_alignment_result
+    result = get_alignment_result(CurrentGlyph())
+'''
+
+from collections import namedtuple
+
+
+
+# Sources
+ONCURVE      = "onCurve"
+ANCHOR       = "anchor"
+COMPONENT    = "component"
+TOOL_PREVIEW = "toolPreview"
+
+# point: the (x, y) that was checked
+# source: one of the sources above
+# category: the matched target category (see alignment.py)
+# value: the target's value (y or x, or the (x, y) origin of a diagonal guide)
+# angle: the angle of the target, as drawn by the eye
+# color: the eye color
+AlignmentEntry = namedtuple("AlignmentEntry", ["point", "source", "category", "value", "angle", "color"])
+
+# entries: a tuple of AlignmentEntry
+AlignmentResult = namedtuple("AlignmentResult", ["glyphName", "layerName", "entries"])
+
+
+REPRESENTATION = "com.ryanbugden.eyeliner.alignmentResult"
+
+
+def result_holder_factory(glyph):
+    return {}
+
+
+_factory_registered = False
+
+
+def get_result_holder(glyph):
+    '''
+    A dict to keep a glyph's result in. It's a defcon representation, so defcon
+    throws it away as soon as the glyph changes, wherever from: a result stored in
+    a holder taken before a change is never returned for the changed glyph.
+    '''
+    global _factory_registered
+    glyph = glyph.naked() if hasattr(glyph, "naked") else glyph
+    if not _factory_registered:
+        from defcon import Glyph, registerRepresentationFactory
+        registerRepresentationFactory(Glyph, REPRESENTATION, result_holder_factory)
+        _factory_registered = True
+    return glyph.getRepresentation(REPRESENTATION)
+
+
+def store_alignment_result(holder, result):
+    '''Keep a result in the holder taken (with get_result_holder) when its glyph was read'''
+    holder["result"] = result
+
+
+def get_alignment_result(glyph):
+    '''The AlignmentResult Eyeliner computed for a glyph as it is now, or None'''
+    return get_result_holder(glyph).get("result")
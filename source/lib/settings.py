@@ -1,8 +1,8 @@
 import ezui
 from mojo.subscriber import getRegisteredSubscriberEvents, registerSubscriberEvent
-from mojo.extensions import getExtensionDefault, setExtensionDefault
+from mojo.extensions import setExtensionDefault
 from mojo.events import postEvent
-from defaults import get_flattened_alpha, get_darkened_blue, EXTENSION_KEY, EXTENSION_DEFAULTS
+from defaults import get_flattened_alpha, get_darkened_blue, load_settings, get_extension_defaults, EXTENSION_KEY
 
 
 class EyelinerSettings(ezui.WindowController):
@@ -19,6 +19,15 @@ class EyelinerSettings(ezui.WindowController):
         > [X] Blue Zones       @showBluesCheckbox
         > [X] Family Blues     @showFamilyBluesCheckbox
         > [ ] Margins          @showMarginsCheckbox
+        > [ ] Implicit Targets @showImplicitTargetsCheckbox
+        > [ ] Anchor Consistency @showAnchorConsistencyCheckbox
+        > : Also Show In:
+        > [ ] Space Center     @showInSpaceCenterCheckbox
+        > [ ] Font Overview    @showInFontOverviewCheckbox
+        > : Italics:
+        > [ ] Slant Vertical Guides @slantVerticalGuidesCheckbox
+        > : Frame Budget (ms):
+        > [_ 8 _]             @frameBudgetField
         
         ---
         
@@ -43,6 +52,21 @@ class EyelinerSettings(ezui.WindowController):
         > * HorizontalStack    @marginsColorStack
         >> * ColorWell         @marginsLightColorWell
         >> * ColorWell         @marginsDarkColorWell
+
+        > : Implicit Targets:
+        > * HorizontalStack    @implicitTargetsColorStack
+        >> * ColorWell         @implicitTargetsLightColorWell
+        >> * ColorWell         @implicitTargetsDarkColorWell
+
+        > : Matching Anchors:
+        > * HorizontalStack    @anchorConsistencyColorStack
+        >> * ColorWell         @anchorConsistencyLightColorWell
+        >> * ColorWell         @anchorConsistencyDarkColorWell
+
+        > : Mismatched Anchors:
+        > * HorizontalStack    @anchorMismatchColorStack
+        >> * ColorWell         @anchorMismatchLightColorWell
+        >> * ColorWell         @anchorMismatchDarkColorWell
         
         > :
         > * HorizontalStack    @labelStack
@@ -102,6 +126,30 @@ class EyelinerSettings(ezui.WindowController):
                 width=colorwell_width,
                 height=colorwell_height
             ),
+            implicitTargetsLightColorWell=dict(
+                width=colorwell_width,
+                height=colorwell_height
+            ),
+            implicitTargetsDarkColorWell=dict(
+                width=colorwell_width,
+                height=colorwell_height
+            ),
+            anchorConsistencyLightColorWell=dict(
+                width=colorwell_width,
+                height=colorwell_height
+            ),
+            anchorConsistencyDarkColorWell=dict(
+                width=colorwell_width,
+                height=colorwell_height
+            ),
+            anchorMismatchLightColorWell=dict(
+                width=colorwell_width,
+                height=colorwell_height
+            ),
+            anchorMismatchDarkColorWell=dict(
+                width=colorwell_width,
+                height=colorwell_height
+            ),
             lightModeLabel=dict(
                 width=colorwell_width,
                 sizeStyle='mini',
@@ -110,6 +158,11 @@ class EyelinerSettings(ezui.WindowController):
                 width=colorwell_width,
                 sizeStyle='mini',
             ),
+            frameBudgetField=dict(
+                valueType="integer",
+                minValue=1,
+                width=40
+            ),
             resetDefaultsButton=dict(
                 width='fill'
             )
@@ -122,7 +175,7 @@ class EyelinerSettings(ezui.WindowController):
             controller=self
         )
         self.w.getNSWindow().setTitlebarAppearsTransparent_(True)
-        prefs = getExtensionDefault(EXTENSION_KEY, fallback=EXTENSION_DEFAULTS)
+        prefs = load_settings()
         try:
             self.w.setItemValues(prefs)
         except KeyError as e:
@@ -135,7 +188,7 @@ class EyelinerSettings(ezui.WindowController):
         self.update_extension_settings()
         
     def resetDefaultsButtonCallback(self, sender):
-        self.w.setItemValues(EXTENSION_DEFAULTS)
+        self.w.setItemValues(get_extension_defaults())
         self.update_extension_settings()
         
     def update_extension_settings(self):
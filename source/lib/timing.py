@@ -0,0 +1,36 @@
+import time
+from contextlib import contextmanager
+
+
+
+# label: [duration in seconds, ...]
+TIMINGS = {}
+
+
+def record(label, start):
+    '''Record the time since start, a time.perf_counter() value, under a label'''
+    TIMINGS.setdefault(label, []).append(time.perf_counter() - start)
+
+
+@contextmanager
+def timed(label):
+    '''Record how long the wrapped block takes, under a label'''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(label, start)
+
+
+def report():
+    '''
+    Return a readable summary of Eyeliner's startup timings. From the Scripting Window:
+
+        import timing
+        print(timing.report())
+    '''
+    lines = ["Eyeliner startup timings:"]
+    for label, durations in TIMINGS.items():
+        total = sum(durations)
+        lines.append(f"  {label:<28} {len(durations):>5}x  total {total * 1000:8.2f} ms  mean {total / len(durations) * 1000:7.2f} ms  max {max(durations) * 1000:7.2f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,405 @@
+'''
+Eyeliner watch mode: check alignment in a UFO on disk, outside of RoboFont.
+
+Only the .glif files that change are parsed again. When fontinfo.plist changes
+(metrics, blues or font guidelines), the font-level targets are rebuilt once and
+only the glyphs with points on a changed value are checked again. A changed
+italic angle or slant offset (lib.plist) has every glyph checked again.
+
+    python watch.py MyFont.ufo [--interval 0.5] [--once] [--skip margin] [--slant-vertical-guides]
+
+Findings are printed as they appear (+) and disappear (-).
+'''
+
+import argparse
+import os
+import plistlib
+import sys
+import time
+from collections import namedtuple
+from fontTools.misc.fixedTools import otRound
+from fontTools.pens.pointPen import AbstractPointPen
+from fontTools.ufoLib import glifLib
+from alignment import FontTargets, GlyphTargets, sort_guidelines, CATEGORY_SETTINGS
+from compute import multiply, transform_point
+
+
+
+Finding = namedtuple("Finding", ["layer", "glyph", "source", "coord", "category", "value", "angle"])
+
+
+def guideline_tuple(guideline):
+    '''Turn a UFO guideline dict into (x, y, angle, color)'''
+    x, y = guideline.get("x"), guideline.get("y")
+    if x is None:
+        return (0, y, 0, None)
+    if y is None:
+        return (x, 0, 90, None)
+    return (x, y, guideline.get("angle", 0), None)
+
+
+def read_plist(path, fallback=None):
+    try:
+        with open(path, "rb") as f:
+            return plistlib.load(f)
+    except (OSError, plistlib.InvalidFileException):
+        return fallback
+
+
+
+class GlyphRecord:
+    '''What glifLib fills in when reading a glyph, plus what the point pen collects'''
+
+    def __init__(self):
+        self.width      = 0
+        self.anchors    = []
+        self.guidelines = []
+        self.oncurves   = []
+        self.components = []
+
+
+
+class RecordPointPen(AbstractPointPen):
+
+    def __init__(self, record):
+        self.record = record
+
+    def beginPath(self, identifier=None, **kwargs):
+        pass
+
+    def endPath(self):
+        pass
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        if segmentType is not None:
+            self.record.oncurves.append(pt)
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        self.record.components.append((baseGlyphName, tuple(transformation)))
+
+
+
+class WatchedLayer:
+    '''One glyphs*/ directory of the UFO'''
+
+    def __init__(self, name, path):
+        self.name     = name
+        self.path     = path
+        self.files    = {}  # file name: (mtime, size)
+        self.names    = {}  # file name: glyph name
+        self.records  = {}  # glyph name: GlyphRecord
+        self.users    = {}  # base glyph name: {composite glyph names}
+        self.contents_stamp = None
+
+
+    def read_contents(self):
+        contents = read_plist(os.path.join(self.path, "contents.plist"), {})
+        self.names = {file_name: glyph_name for glyph_name, file_name in contents.items()}
+
+
+    def scan(self):
+        '''Return the glyph names whose .glif files were added, changed or removed since the last scan'''
+        # Removed files are only in the contents as they were.
+        old_names = self.names
+        stamp = file_stamp(os.path.join(self.path, "contents.plist"))
+        if stamp != self.contents_stamp:
+            self.contents_stamp = stamp
+            self.read_contents()
+        files = {}
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".glif"):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            # Deleted since it was listed
+                            continue
+                        files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            # Not written yet, or being replaced: try again on the next scan.
+            return set()
+        changed = {file_name for file_name, stamp in files.items() if self.files.get(file_name) != stamp}
+        removed = set(self.files) - set(files)
+        self.files = files
+        if any(file_name not in self.names for file_name in changed):
+            # A glyph was added and contents.plist was written after our check.
+            self.read_contents()
+        names = set()
+        for file_name in changed:
+            glyph_name = self.names.get(file_name)
+            if glyph_name is not None:
+                self.load(glyph_name, file_name)
+                names.add(glyph_name)
+        for file_name in removed:
+            glyph_name = old_names.get(file_name)
+            if glyph_name is not None:
+                self.set_record(glyph_name, None)
+                names.add(glyph_name)
+        return names
+
+
+    def load(self, glyph_name, file_name):
+        record = GlyphRecord()
+        try:
+            with open(os.path.join(self.path, file_name), "rb") as f:
+                glifLib.readGlyphFromString(f.read(), glyphObject=record, pointPen=RecordPointPen(record))
+        except Exception as e:
+            # Most likely caught mid-save, the next scan will pick it up.
+            print(f"Eyeliner: couldn't read {file_name}: {e}", file=sys.stderr)
+            self.files.pop(file_name, None)
+            return
+        self.set_record(glyph_name, record)
+
+
+    def set_record(self, glyph_name, record):
+        old = self.records.pop(glyph_name, None)
+        if old is not None:
+            for base_name, _ in old.components:
+                self.users.get(base_name, set()).discard(glyph_name)
+        if record is not None:
+            self.records[glyph_name] = record
+            for base_name, _ in record.components:
+                self.users.setdefault(base_name, set()).add(glyph_name)
+
+
+    def with_users(self, glyph_names):
+        '''The glyphs plus every composite that uses them, however deeply nested'''
+        result = set()
+        todo = list(glyph_names)
+        while todo:
+            glyph_name = todo.pop()
+            if glyph_name in result:
+                continue
+            result.add(glyph_name)
+            todo.extend(self.users.get(glyph_name, ()))
+        return result
+
+
+    def component_oncurves(self, glyph_name, transformation=(1, 0, 0, 1, 0, 0), seen=()):
+        '''On-curve points of a glyph's components, as if they were decomposed'''
+        record = self.records.get(glyph_name)
+        if record is None or glyph_name in seen:
+            return []
+        seen = seen + (glyph_name,)
+        points = []
+        for base_name, base_transformation in record.components:
+            base = self.records.get(base_name)
+            if base is None:
+                continue
+            combined = multiply(transformation, base_transformation)
+            points.extend(transform_point(combined, pt) for pt in base.oncurves)
+            points.extend(self.component_oncurves(base_name, combined, seen))
+        return points
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+
+class UFOWatcher:
+
+    def __init__(self, ufo_path, skip=(), emit=print, slant_vertical_guides=False):
+        self.ufo_path = ufo_path
+        self.enabled  = {category: category not in skip for category in CATEGORY_SETTINGS}
+        self.slant_vertical_guides = slant_vertical_guides
+        self.emit     = emit
+        self.layers   = {}  # directory name: WatchedLayer
+        self.findings = {}  # (layer name, glyph name): frozenset of Findings
+        self.coords   = {}  # (layer name, glyph name): (rounded xs, rounded ys) that were checked against guides
+        self.info_stamp = None
+        self.font_targets = FontTargets(enabled=self.enabled)
+
+
+    def read_font_targets(self):
+        info = read_plist(os.path.join(self.ufo_path, "fontinfo.plist"), {})
+        lib  = read_plist(os.path.join(self.ufo_path, "lib.plist"), {})
+        guide_ys, guide_xs, guide_diags = sort_guidelines(
+            [guideline_tuple(guideline) for guideline in info.get("guidelines", [])],
+            None
+            )
+        return FontTargets(
+            font_dims    = [info.get("descender"), 0, info.get("xHeight"), info.get("ascender"), info.get("capHeight")],
+            blues        = info.get("postscriptBlueValues", []) + info.get("postscriptOtherBlues", []),
+            family_blues = info.get("postscriptFamilyBlues", []) + info.get("postscriptFamilyOtherBlues", []),
+            guide_ys     = guide_ys,
+            guide_xs     = guide_xs,
+            guide_diags  = guide_diags,
+            enabled      = self.enabled,
+            italic_angle = info.get("italicAngle", 0),
+            slant_offset = lib.get("com.typemytype.robofont.italicSlantOffset", 0),
+            slant_vertical_guides = self.slant_vertical_guides,
+            )
+
+
+    def layer_names(self):
+        '''Map glyphs*/ directory names to layer names, or return None if the UFO can't be read right now'''
+        layer_contents = read_plist(os.path.join(self.ufo_path, "layercontents.plist"), [])
+        names = {directory: name for name, directory in layer_contents}
+        try:
+            with os.scandir(self.ufo_path) as entries:
+                for entry in entries:
+                    if entry.is_dir() and entry.name.startswith("glyphs"):
+                        names.setdefault(entry.name, entry.name)
+        except OSError:
+            return None
+        return names
+
+
+    def poll(self):
+        '''Check whatever changed since the last poll'''
+        layer_names = self.layer_names()
+        if layer_names is None:
+            # The UFO is missing mid-save (swapped in by a rename, say): try again on the next poll.
+            return
+
+        # Font-level targets first, so changed glyphs get checked against the new ones.
+        affected_values = None
+        stamp = (
+            file_stamp(os.path.join(self.ufo_path, "fontinfo.plist")),
+            file_stamp(os.path.join(self.ufo_path, "lib.plist")),
+            )
+        if stamp != self.info_stamp:
+            self.info_stamp = stamp
+            old_targets, self.font_targets = self.font_targets, self.read_font_targets()
+            affected_values = changed_values(old_targets, self.font_targets)
+
+        for directory in list(self.layers):
+            if directory not in layer_names:
+                layer = self.layers.pop(directory)
+                for glyph_name in list(layer.records):
+                    self.forget(layer, glyph_name)
+        for directory, name in layer_names.items():
+            layer = self.layers.get(directory)
+            if layer is None:
+                layer = self.layers[directory] = WatchedLayer(name, os.path.join(self.ufo_path, directory))
+            to_check = layer.with_users(layer.scan())
+            if affected_values is not None:
+                to_check |= self.glyphs_on_values(layer, affected_values)
+            for glyph_name in sorted(to_check):
+                self.check_glyph(layer, glyph_name)
+
+
+    def glyphs_on_values(self, layer, affected_values):
+        if affected_values is True:
+            return set(layer.records)
+        xs, ys = affected_values
+        glyph_names = set()
+        for glyph_name in layer.records:
+            glyph_xs, glyph_ys = self.coords.get((layer.name, glyph_name), (frozenset(), frozenset()))
+            if not glyph_xs.isdisjoint(xs) or not glyph_ys.isdisjoint(ys):
+                glyph_names.add(glyph_name)
+        return glyph_names
+
+
+    def check_glyph(self, layer, glyph_name):
+        record = layer.records.get(glyph_name)
+        if record is None:
+            self.forget(layer, glyph_name)
+            return
+        guide_ys, guide_xs, guide_diags = sort_guidelines(
+            [guideline_tuple(guideline) for guideline in record.guidelines],
+            None
+            )
+        targets = GlyphTargets(self.font_targets, record.width, guide_ys, guide_xs, guide_diags)
+        points = [("on-curve", pt) for pt in record.oncurves]
+        points += [("anchor", (anchor["x"], anchor["y"])) for anchor in record.anchors]
+        oncurves = set(record.oncurves)
+        points += [("component", pt) for pt in layer.component_oncurves(glyph_name) if pt not in oncurves]
+        findings = frozenset(
+            Finding(layer.name, glyph_name, source, (otRound(pt[0]), otRound(pt[1])), match.category, match.value, match.angle)
+            for source, pt in points
+            for match in targets.match(pt)
+            )
+        key = (layer.name, glyph_name)
+        # The xs that vertical guides are compared against: unslanted, if they follow the italic angle
+        ft = self.font_targets
+        if ft.slant_vertical_guides:
+            xs = frozenset(otRound(pt[0] - ft.shear * pt[1]) for _, pt in points)
+        else:
+            xs = frozenset(otRound(pt[0]) for _, pt in points)
+        self.coords[key] = (xs, frozenset(otRound(pt[1]) for _, pt in points))
+        self.report(key, findings)
+
+
+    def forget(self, layer, glyph_name):
+        key = (layer.name, glyph_name)
+        self.coords.pop(key, None)
+        self.report(key, frozenset())
+
+
+    def report(self, key, findings):
+        old = self.findings.get(key, frozenset())
+        for finding in sorted(old - findings, key=sort_key):
+            self.emit(format_finding("-", finding))
+        for finding in sorted(findings - old, key=sort_key):
+            self.emit(format_finding("+", finding))
+        if findings:
+            self.findings[key] = findings
+        else:
+            self.findings.pop(key, None)
+
+
+    def run(self, interval=0.5):
+        while True:
+            self.poll()
+            time.sleep(interval)
+
+
+def changed_values(old, new):
+    '''
+    The rounded (xs, ys) whose font-level target changed between two FontTargets,
+    or True if every glyph needs another look (diagonal guides or the slant changed).
+    '''
+    if old.guide_diags != new.guide_diags:
+        return True
+    if (old.shear, old.slant_offset, old.slant_vertical_guides) != (new.shear, new.slant_offset, new.slant_vertical_guides):
+        return True
+    ys = changed_guides(old.guide_ys, new.guide_ys)
+    for values in (old.font_dims, new.font_dims, old.blues, new.blues, old.family_blues, new.family_blues):
+        ys.update(y for y in values if old.horizontal_category(y) != new.horizontal_category(y))
+    xs = changed_guides(old.guide_xs, new.guide_xs)
+    return xs, ys
+
+
+def changed_guides(old, new):
+    '''Guide values that were added, removed or recolored (guides read from a UFO have no color, so None)'''
+    return set(old.keys() ^ new.keys()) | {value for value in old.keys() & new.keys() if old[value] != new[value]}
+
+
+def sort_key(finding):
+    # Values are numbers, or (x, y) origins for diagonal guides
+    return (finding.source, finding.coord, finding.category, str(finding.value))
+
+
+def format_finding(sign, finding):
+    x, y = finding.coord
+    return f"{sign} {finding.glyph} [{finding.layer}]  {finding.source} ({x}, {y})  {finding.category} {finding.value}"
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Watch a UFO and report Eyeliner alignment findings as glyphs change.")
+    parser.add_argument("ufo", help="Path to the .ufo")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between checks for changed files")
+    parser.add_argument("--once", action="store_true", help="Check the whole font once and exit")
+    parser.add_argument("--skip", action="append", default=[], choices=sorted(CATEGORY_SETTINGS), help="Target category to leave out (repeatable)")
+    parser.add_argument("--slant-vertical-guides", action="store_true", help="In italic fonts, slant vertical guides by the italic angle, like the margins")
+    options = parser.parse_args(args)
+
+    watcher = UFOWatcher(options.ufo, skip=options.skip, slant_vertical_guides=options.slant_vertical_guides)
+    if options.once:
+        watcher.poll()
+        return
+    try:
+        watcher.run(options.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
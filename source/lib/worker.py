@@ -0,0 +1,76 @@
+import queue
+import threading
+import traceback
+
+
+
+class Worker:
+    '''
+    Runs jobs on a background thread and hands their results back on the main thread.
+
+    Every job is submitted under a key, and carries a generation number for that key.
+    A job whose key has been resubmitted since is stale: it's skipped if it hasn't
+    started yet, and its result is dropped if it has.
+    '''
+
+    def __init__(self, name="eyeliner.worker"):
+        self.name = name
+        self.queue = queue.Queue()
+        self.generations = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+
+    def submit(self, key, job, callback):
+        '''Run job() in the background, then callback(result) on the main thread, unless a newer job for key came in'''
+        with self.lock:
+            generation = self.generations.get(key, 0) + 1
+            self.generations[key] = generation
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+                self.thread.start()
+        self.queue.put((key, generation, job, callback))
+        return generation
+
+
+    def cancel(self, key):
+        '''Make any queued or running job for key stale'''
+        with self.lock:
+            if key in self.generations:
+                self.generations[key] += 1
+
+
+    def is_current(self, key, generation):
+        with self.lock:
+            return self.generations.get(key) == generation
+
+
+    def run(self):
+        from PyObjCTools.AppHelper import callAfter
+        while True:
+            key, generation, job, callback = self.queue.get()
+            if not self.is_current(key, generation):
+                continue
+            try:
+                result = job()
+            except Exception:
+                traceback.print_exc()
+                continue
+            callAfter(self.deliver, key, generation, result, callback)
+
+
+    def deliver(self, key, generation, result, callback):
+        if self.is_current(key, generation):
+            callback(result)
+
+
+
+_worker = None
+
+
+def get_worker():
+    '''The worker thread shared by every glyph editor'''
+    global _worker
+    if _worker is None:
+        _worker = Worker()
+    return _worker
@@ -0,0 +1,65 @@
+import os
+import sys
+import threading
+import types
+import pytest
+
+# The extension's modules import each other flatly, as RoboFont puts source/lib on the path.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source", "lib"))
+
+
+
+class RunLoop:
+    '''Stands in for the main run loop: callAfter/callLater queue up, and run when the test says so'''
+
+    def __init__(self):
+        self.soon = []   # (func, args)
+        self.later = []  # (delay, func, args)
+
+
+    def callAfter(self, func, *args):
+        self.soon.append((func, args))
+
+
+    def callLater(self, delay, func, *args):
+        self.later.append((delay, func, args))
+
+
+    def run_pass(self):
+        '''Run what was queued for the next pass (not what that queues in turn)'''
+        soon, self.soon = self.soon, []
+        for func, args in soon:
+            func(*args)
+
+
+    def run_later(self):
+        later, self.later = self.later, []
+        for delay, func, args in later:
+            func(*args)
+
+
+    def drain(self):
+        '''Run passes, and wait for background threads, until nothing is left to do'''
+        while True:
+            if self.soon:
+                self.run_pass()
+                continue
+            threads = [thread for thread in threading.enumerate() if thread.name.startswith("eyeliner.")]
+            if not threads:
+                return
+            for thread in threads:
+                thread.join()
+
+
+
+@pytest.fixture
+def run_loop(monkeypatch):
+    loop = RunLoop()
+    app_helper = types.ModuleType("PyObjCTools.AppHelper")
+    app_helper.callAfter = loop.callAfter
+    app_helper.callLater = loop.callLater
+    package = types.ModuleType("PyObjCTools")
+    package.AppHelper = app_helper
+    monkeypatch.setitem(sys.modules, "PyObjCTools", package)
+    monkeypatch.setitem(sys.modules, "PyObjCTools.AppHelper", app_helper)
+    return loop
@@ -0,0 +1,48 @@
+from alignment import FontTargets, GlyphTargets, FONT_DIMENSION, BLUE, MARGIN, GLOBAL_GUIDE, LOCAL_GUIDE, IMPLICIT
+
+
+def categories(targets, coord):
+    return [(match.category, match.value, match.angle) for match in targets.match(coord)]
+
+
+def test_font_dimensions_and_margins():
+    targets = GlyphTargets(FontTargets(font_dims=[-200, 0, 500, 700]), 600)
+    assert categories(targets, (0, 700)) == [(FONT_DIMENSION, 700, 0), (MARGIN, 0, 90)]
+    assert categories(targets, (600.4, 499.6)) == [(FONT_DIMENSION, 500, 0), (MARGIN, 600, 90)]
+    assert categories(targets, (300, 300)) == []
+
+
+def test_first_category_in_line_wins():
+    targets = GlyphTargets(FontTargets(font_dims=[500], blues=[500, 510], guide_ys={500: (1, 0, 0, 1)}), 600)
+    assert categories(targets, (300, 500)) == [(GLOBAL_GUIDE, 500, 0)]
+    assert categories(targets, (300, 510)) == [(BLUE, 510, 0)]
+
+
+def test_hidden_category_ends_the_search():
+    targets = GlyphTargets(FontTargets(font_dims=[500], blues=[500], enabled={FONT_DIMENSION: False, BLUE: True}), 600)
+    assert categories(targets, (300, 500)) == []
+
+
+def test_local_guides_and_implicit_targets():
+    font_targets = FontTargets(implicit_xs=[80], implicit_ys=[250])
+    targets = GlyphTargets(font_targets, 600, guide_ys={}, guide_xs={300: (0, 0, 1, 1)})
+    assert categories(targets, (300, 250)) == [(IMPLICIT, 250, 0), (LOCAL_GUIDE, 300, 90)]
+    assert categories(targets, (80, 100)) == [(IMPLICIT, 80, 90)]
+
+
+def test_italic_margins_follow_the_slant():
+    # At -12°, a point 100 units up the left margin sits about 21 units to the right.
+    font_targets = FontTargets(italic_angle=-12, slant_offset=-10)
+    targets = GlyphTargets(font_targets, 500)
+    assert targets.margins == (-10, 490)
+    assert categories(targets, (11, 100)) == [(MARGIN, -10, 78)]
+    assert categories(targets, (-10, 100)) == []
+
+
+def test_vertical_guides_stay_upright_unless_asked():
+    guide_xs = {100: (0, 0, 1, 1)}
+    upright = GlyphTargets(FontTargets(guide_xs=guide_xs, italic_angle=-12), 500)
+    slanted = GlyphTargets(FontTargets(guide_xs=guide_xs, italic_angle=-12, slant_vertical_guides=True), 500)
+    assert categories(upright, (100, 200)) == [(GLOBAL_GUIDE, 100, 90)]
+    assert categories(slanted, (100, 200)) == []
+    assert categories(slanted, (143, 200)) == [(GLOBAL_GUIDE, 100, 78)]
@@ -0,0 +1,79 @@
+import pytest
+from anchorindex import AnchorIndex, MIN_SIBLINGS, TOLERANCE
+
+defcon = pytest.importorskip("defcon")
+
+
+@pytest.fixture
+def font():
+    # A "top" anchor at y=700, in the center of each glyph (x offset 0)
+    font = defcon.Font()
+    for name in ("A", "B", "C", "D"):
+        glyph = font.newGlyph(name)
+        glyph.width = 500
+        glyph.appendAnchor(dict(name="top", x=250, y=700))
+    font["D"].appendAnchor(dict(name="bottom", x=250, y=0))
+    return font
+
+
+@pytest.fixture
+def index(run_loop, font):
+    index = AnchorIndex(font)
+    index.start()
+    run_loop.drain()
+    return index
+
+
+def test_nothing_before_the_scan(run_loop, font):
+    index = AnchorIndex(font)
+    assert index.dominant("top", "A") == (None, None)
+    assert index.check("top", "A", (250, 700), 500) == []
+
+
+def test_matched_anchor(index):
+    assert index.dominant("top", "A") == (700, 0)
+    assert index.check("top", "A", (250, 700), 500) == [(0, True, 700), (90, True, 0)]
+
+
+def test_close_but_off(index):
+    assert index.check("top", "A", (250 + TOLERANCE, 700 - TOLERANCE), 500) == [(0, False, 700), (90, False, 0)]
+    # Further off isn't flagged at all.
+    assert index.check("top", "A", (250 + TOLERANCE + 1, 600), 500) == []
+
+
+def test_own_contribution_is_left_out(run_loop, font, index):
+    for name in ("B", "C"):
+        font[name].anchors[0].y = 710
+    run_loop.drain()
+    # A and D at 700, B and C at 710: each glyph only counts the other three.
+    assert index.dominant("top", "B")[0] == 700
+    assert index.dominant("top", "A")[0] == 710
+
+
+def test_too_few_siblings(index):
+    # Only D has a "bottom".
+    assert index.dominant("bottom", "D") == (None, None)
+    assert index.dominant("bottom", "E") == (None, None)
+    assert index.dominant("missing", "A") == (None, None)
+
+
+def test_min_siblings(run_loop, font, index):
+    glyph = font.newGlyph("E")
+    glyph.width = 500
+    glyph.appendAnchor(dict(name="bottom", x=250, y=0))
+    run_loop.drain()
+    # E and D both have a "bottom": for a third glyph, MIN_SIBLINGS agree.
+    assert MIN_SIBLINGS == 2
+    assert index.dominant("bottom", "F") == (0, 0)
+    # For D itself, only E is left.
+    assert index.dominant("bottom", "D") == (None, None)
+
+
+def test_x_offsets_follow_the_width(run_loop, font, index):
+    for name in ("A", "B", "C"):
+        font[name].width = 600
+    run_loop.drain()
+    # The anchors stayed at x=250, which is now 50 left of the center.
+    assert index.dominant("top", "D") == (700, -50)
+    assert index.check("top", "D", (250, 700), 600) == [(0, True, 700), (90, True, -50)]
+    assert index.check("top", "D", (250, 700), 500) == [(0, True, 700)]
@@ -0,0 +1,106 @@
+import time
+import pytest
+from budget import FrameBudget, get_budget_stats, reset_budget_stats
+
+
+def test_runs_by_priority_on_next_pass(run_loop):
+    frame_budget = FrameBudget(budget_ms=1000)
+    ran = []
+    frame_budget.request("b", 2, lambda: ran.append("b"))
+    frame_budget.request("a", 0, lambda: ran.append("a"))
+    assert ran == []
+    run_loop.run_pass()
+    assert ran == ["a", "b"]
+
+
+def test_newer_request_replaces_pending_one(run_loop):
+    frame_budget = FrameBudget(budget_ms=1000)
+    ran = []
+    frame_budget.request("a", 0, lambda: ran.append(1))
+    frame_budget.request("a", 0, lambda: ran.append(2))
+    run_loop.run_pass()
+    assert ran == [2]
+    # Only one pass was scheduled for both.
+    assert run_loop.soon == []
+
+
+def test_over_budget_work_waits_for_idle(run_loop):
+    reset_budget_stats()
+    partial = []
+    frame_budget = FrameBudget(budget_ms=1, partial_callback=partial.append)
+    ran = []
+    frame_budget.request("slow", 0, lambda: (time.sleep(0.005), ran.append("slow")))
+    frame_budget.request("later", 1, lambda: ran.append("later"))
+    run_loop.run_pass()
+    assert ran == ["slow"]
+    assert partial == [True]
+    stats = get_budget_stats()
+    assert (stats.passes, stats.overruns, stats.deferred) == (1, 1, 1)
+
+    # Idle: the deferred work runs.
+    run_loop.run_later()
+    assert ran == ["slow", "later"]
+    assert partial == [True, False]
+
+
+def test_idle_check_waits_while_busy(run_loop):
+    frame_budget = FrameBudget(budget_ms=0)
+    ran = []
+    frame_budget.request("a", 0, lambda: ran.append("a"))
+    frame_budget.request("b", 1, lambda: ran.append("b"))
+    run_loop.run_pass()
+    (delay, idle_check, (activity,)), = run_loop.later
+    run_loop.later = []
+    # Something was requested since the pass, so it keeps waiting.
+    idle_check(activity - 1)
+    assert ran == ["a"]
+    assert len(run_loop.later) == 1
+    idle_check(activity)
+    assert ran == ["a", "b"]
+
+
+def test_at_least_one_item_runs_per_pass(run_loop):
+    frame_budget = FrameBudget(budget_ms=0)
+    ran = []
+    frame_budget.request("a", 0, lambda: ran.append("a"))
+    frame_budget.request("b", 1, lambda: ran.append("b"))
+    run_loop.run_pass()
+    assert ran == ["a"]
+
+
+def test_closed_budget_runs_nothing(run_loop):
+    frame_budget = FrameBudget()
+    ran = []
+    frame_budget.request("a", 0, lambda: ran.append("a"))
+    frame_budget.close()
+    run_loop.run_pass()
+    assert ran == []
+
+
+def test_job_may_cancel_work_later_in_the_same_pass(run_loop):
+    frame_budget = FrameBudget(budget_ms=1000)
+    ran = []
+    frame_budget.request("check", 0, lambda: (frame_budget.cancel("apply"), ran.append("check")))
+    frame_budget.request("apply", 1, lambda: ran.append("apply"))
+    frame_budget.request("other", 2, lambda: ran.append("other"))
+    run_loop.run_pass()
+    assert ran == ["check", "other"]
+
+
+def test_failing_job_still_finishes_the_bookkeeping(run_loop):
+    reset_budget_stats()
+    partial = []
+    frame_budget = FrameBudget(budget_ms=1000, partial_callback=partial.append)
+    ran = []
+    def fail():
+        raise ValueError
+    frame_budget.request("fail", 0, fail)
+    frame_budget.request("later", 1, lambda: ran.append("later"))
+    with pytest.raises(ValueError):
+        run_loop.run_pass()
+    assert get_budget_stats().passes == 1
+    # What the failed pass didn't get to waits for idle time.
+    assert partial == [True]
+    run_loop.run_later()
+    assert ran == ["later"]
+    assert partial == [True, False]
@@ -0,0 +1,100 @@
+import pytest
+import components
+from alignment import FontTargets, GlyphTargets
+from compute import GlyphSnapshot, get_oncurves, get_component_oncurves, match_points
+from components import ComponentPoints
+from results import COMPONENT
+
+
+TARGETS = GlyphTargets(FontTargets(font_dims=[-200, 0, 500, 700]), 600)
+
+
+def make_snapshot(name, points=(), components=()):
+    contours = (tuple((x, y, "line") for x, y in points),) if points else ()
+    return GlyphSnapshot(name, 600, contours, tuple(components), ())
+
+
+def moved(dx, dy):
+    return (1, 0, 0, 1, dx, dy)
+
+
+@pytest.fixture
+def matched(monkeypatch):
+    '''The coords that were matched, per call'''
+    calls = []
+    def counting_match_points(targets, coords, source):
+        calls.append(coords)
+        return match_points(targets, coords, source)
+    monkeypatch.setattr(components, "match_points", counting_match_points)
+    return calls
+
+
+def full_match(snapshot, bases, targets=TARGETS):
+    oncurves = set(get_oncurves(snapshot))
+    coords = [pt for pt in get_component_oncurves(snapshot, bases) if pt not in oncurves]
+    return match_points(targets, coords, COMPONENT)
+
+
+BASES = {
+    "dot":  make_snapshot("dot", [(0, 0), (0, 100), (100, 100), (100, 0)]),
+    "stem": make_snapshot("stem", [(0, 0), (0, 500), (80, 500), (80, 0)]),
+    "i":    make_snapshot("i", components=[("stem", moved(0, 0)), ("dot", moved(-10, 600))]),
+    }
+
+
+def test_moving_one_component_matches_only_that_one(matched):
+    component_points = ComponentPoints()
+    glyph = make_snapshot("ij", components=[("i", moved(0, 0)), ("dot", moved(300, 600))])
+    component_points.match(glyph, BASES, TARGETS)
+    assert len(matched) == 2
+
+    matched.clear()
+    glyph = make_snapshot("ij", components=[("i", moved(0, 0)), ("dot", moved(300, 400))])
+    entries = component_points.match(glyph, dict(BASES), TARGETS)
+    assert matched == [[(300, 400), (300, 500), (400, 500), (400, 400)]]
+    assert entries == full_match(glyph, BASES)
+
+
+def test_same_component_twice_is_matched_once(matched):
+    glyph = make_snapshot("colon", components=[("dot", moved(0, 0)), ("dot", moved(0, 0))])
+    ComponentPoints().match(glyph, BASES, TARGETS)
+    assert len(matched) == 1
+
+
+def test_editing_a_nested_base_drops_only_what_uses_it(matched):
+    component_points = ComponentPoints()
+    glyph = make_snapshot("ij", components=[("i", moved(0, 0)), ("stem", moved(300, 0)), ("dot", moved(300, 600))])
+    component_points.match(glyph, BASES, TARGETS)
+    dot_array = component_points.base_arrays["dot"]
+
+    bases = dict(BASES, stem=make_snapshot("stem", [(0, 0), (0, 700), (80, 700), (80, 0)]))
+    matched.clear()
+    entries = component_points.match(glyph, bases, TARGETS)
+    # "i" nests the stem, so it goes too; the dot stays.
+    assert component_points.base_arrays["dot"] is dot_array
+    assert len(matched) == 2
+    assert entries == full_match(glyph, bases)
+
+
+def test_new_targets_match_everything_again(matched):
+    component_points = ComponentPoints()
+    glyph = make_snapshot("ij", components=[("i", moved(0, 0)), ("dot", moved(300, 600))])
+    component_points.match(glyph, BASES, TARGETS)
+    matched.clear()
+    targets = GlyphTargets(FontTargets(font_dims=[100]), 600)
+    entries = component_points.match(glyph, BASES, targets)
+    assert len(matched) == 2
+    assert entries == full_match(glyph, BASES, targets)
+
+
+@pytest.mark.parametrize("transformation", [
+    (1, 0, 0.2, 1, 10, 0),       # Slanted
+    (1, 0.1, 0, 1, 0, -20),      # Sheared vertically
+    (0.5, 0.3, -0.3, 0.5, 300, 200),
+    (-1, 0, 0, 1, 600, 0),       # Flipped
+    ])
+def test_transformations_match_decomposing(transformation):
+    glyph = make_snapshot("test", components=[("i", transformation)])
+    component_points = ComponentPoints()
+    assert component_points.transform("i", transformation, BASES) == pytest.approx(get_component_oncurves(glyph, BASES))
+    assert component_points.match(glyph, BASES, TARGETS) == full_match(glyph, BASES)
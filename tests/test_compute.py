@@ -0,0 +1,39 @@
+from compute import GlyphSnapshot, get_line_intersections, iter_segments
+
+
+def make_snapshot(*contours):
+    return GlyphSnapshot("test", 100, tuple(tuple(contour) for contour in contours), (), ())
+
+
+SQUARE = make_snapshot([(0, 0, "line"), (0, 100, "line"), (100, 100, "line"), (100, 0, "line")])
+
+
+def test_line_across_square():
+    assert sorted(get_line_intersections(SQUARE, ((-50, 50), (150, 50)))) == [(0, 50), (100, 50)]
+
+
+def test_line_beyond_square():
+    # The segments' infinite extensions would cross y=200; the segments themselves don't.
+    assert get_line_intersections(SQUARE, ((-50, 200), (150, 200))) == []
+
+
+def test_line_ending_inside_square():
+    assert get_line_intersections(SQUARE, ((-50, 50), (50, 50))) == [(0, 50)]
+
+
+def test_line_through_corner_counts_once():
+    assert get_line_intersections(SQUARE, ((-50, -50), (150, 150))) == [(0, 0), (100, 100)]
+
+
+def test_zero_length_line():
+    assert get_line_intersections(SQUARE, ((50, 50), (50, 50))) == []
+
+
+def test_offcurve_only_contour():
+    # A TrueType "o": four off-curves, with on-curves implied halfway between them.
+    circle = make_snapshot([(0, 0, None), (0, 100, None), (100, 100, None), (100, 0, None)])
+    segments = list(iter_segments(circle.contours[0]))
+    assert len(segments) == 4
+    assert segments[0][0] == segments[-1][-1] == (50, 0)
+    assert sorted(get_line_intersections(circle, ((-50, 50), (150, 50)))) == [(0, 50), (100, 50)]
+    assert get_line_intersections(circle, ((-50, 200), (150, 200))) == []
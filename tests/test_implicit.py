@@ -0,0 +1,126 @@
+import threading
+import pytest
+from implicit import CoordinateHistogram, ImplicitTargets
+
+defcon = pytest.importorskip("defcon")
+
+
+def test_histogram_grows_both_ways():
+    histogram = CoordinateHistogram()
+    histogram.add([10, 12])
+    histogram.add([-5, 40])
+    histogram.add([10])
+    assert histogram.origin == -5
+    assert histogram.counts[10 - histogram.origin] == 2
+    histogram.add([10], -1)
+    assert histogram.counts[10 - histogram.origin] == 1
+
+
+def test_histogram_peaks_cluster_nearby_values():
+    histogram = CoordinateHistogram()
+    for _ in range(5):
+        histogram.add([100])
+    for _ in range(3):
+        histogram.add([102])
+    for _ in range(4):
+        histogram.add([300])
+    histogram.add([500])
+    assert histogram.peaks(min_count=4) == {100, 300}
+    assert histogram.peaks(min_count=5) == {100}
+
+
+def add_rectangle(glyph, x0, y0, x1, y1):
+    pen = glyph.getPointPen()
+    pen.beginPath()
+    for pt in ((x0, y0), (x0, y1), (x1, y1), (x1, y0)):
+        pen.addPoint(pt, "line")
+    pen.endPath()
+
+
+@pytest.fixture
+def font():
+    font = defcon.Font()
+    for i in range(6):
+        glyph = font.newGlyph(f"bar{i}")
+        add_rectangle(glyph, 10, 0, 90 + i * 20, 500)
+    return font
+
+
+def test_scan_finds_shared_coordinates(run_loop, font):
+    index = ImplicitTargets(font)
+    index.start()
+    assert index.targets() == (frozenset(), frozenset())
+    run_loop.drain()
+    assert index.targets() == ({10}, {0, 500})
+
+
+def test_follows_font_edits(run_loop, font):
+    class Listener:
+        def __init__(self):
+            self.calls = 0
+        def changed(self):
+            self.calls += 1
+    listener = Listener()
+    index = ImplicitTargets(font)
+    index.add_listener(listener.changed)
+    index.start()
+    run_loop.drain()
+    calls = listener.calls
+
+    # Move two glyphs' tops: 500 is still shared by four glyphs, 520 by only two.
+    for name in ("bar0", "bar1"):
+        for contour in font[name]:
+            for point in contour:
+                if point.y == 500:
+                    point.y = 520
+            contour.dirty = True
+        font[name].postNotification("Glyph.ContoursChanged")
+    run_loop.drain()
+    assert listener.calls == calls + 1
+    assert index.targets() == ({10}, {0, 500})
+
+    # Remove two more: 500 drops below the minimum of four glyphs.
+    del font["bar2"]
+    del font["bar3"]
+    run_loop.drain()
+    assert index.targets() == ({10}, {0})
+
+
+def lock_is_free(lock):
+    '''Whether another thread could take the lock right now'''
+    result = []
+    def try_lock():
+        acquired = lock.acquire(blocking=False)
+        if acquired:
+            lock.release()
+        result.append(acquired)
+    thread = threading.Thread(target=try_lock)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_combining_the_scan_leaves_the_lock_free(run_loop, font):
+    index = ImplicitTargets(font)
+    free = []
+    combine = index.combine
+    def checked_combine(data, contribution, sign):
+        free.append(lock_is_free(index.lock))
+        combine(data, contribution, sign)
+    index.combine = checked_combine
+    index.start()
+    run_loop.drain()
+    assert free and all(free)
+    assert index.targets() == ({10}, {0, 500})
+
+
+def test_targets_dont_wait_for_the_first_scan(run_loop, font):
+    index = ImplicitTargets(font)
+    index.start()
+    done = []
+    with index.lock:
+        # The main thread asks while the scan is being combined.
+        thread = threading.Thread(target=lambda: done.append(index.targets()))
+        thread.start()
+        thread.join(timeout=1)
+    assert done == [(frozenset(), frozenset())]
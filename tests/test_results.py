@@ -0,0 +1,47 @@
+import pytest
+from results import AlignmentResult, get_alignment_result, get_result_holder, store_alignment_result
+
+defcon = pytest.importorskip("defcon")
+
+
+@pytest.fixture
+def font():
+    font = defcon.Font()
+    font.newGlyph("a").width = 500
+    return font
+
+
+@pytest.fixture
+def glyph(font):
+    return font["a"]
+
+
+def test_result_is_kept_until_the_glyph_changes(glyph):
+    assert get_alignment_result(glyph) is None
+    result = AlignmentResult("a", "public.default", ())
+    store_alignment_result(get_result_holder(glyph), result)
+    assert get_alignment_result(glyph) is result
+    # Changed from anywhere: a script, another window, Font Overview
+    glyph.width = 600
+    assert get_alignment_result(glyph) is None
+
+
+def test_result_of_an_outdated_read_is_never_returned(glyph):
+    holder = get_result_holder(glyph)
+    glyph.width = 600
+    # Computed from the glyph as it was
+    store_alignment_result(holder, AlignmentResult("a", "public.default", ()))
+    assert get_alignment_result(glyph) is None
+
+
+def test_rename_drops_the_result(font, glyph):
+    store_alignment_result(get_result_holder(glyph), AlignmentResult("a", "public.default", ()))
+    glyph.name = "b"
+    assert get_alignment_result(glyph) is None
+    assert get_alignment_result(font.newGlyph("a")) is None
+
+
+def test_glyph_outside_a_font_keeps_nothing():
+    glyph = defcon.Glyph()
+    store_alignment_result(get_result_holder(glyph), AlignmentResult("a", None, ()))
+    assert get_alignment_result(glyph) is None
@@ -0,0 +1,253 @@
+import os
+import plistlib
+import pytest
+from fontTools.ufoLib import UFOWriter
+from watch import UFOWatcher, main
+
+
+class Info:
+    unitsPerEm = 1000
+    descender = -200
+    xHeight = 500
+    capHeight = 700
+    ascender = 750
+
+
+class Glyph:
+
+    def __init__(self, width):
+        self.width = width
+
+
+def rectangle(x0, y0, x1, y1, components=()):
+    def draw_points(pen):
+        pen.beginPath()
+        for pt in ((x0, y0), (x0, y1), (x1, y1), (x1, y0)):
+            pen.addPoint(pt, "line")
+        pen.endPath()
+        for base_name, transformation in components:
+            pen.addComponent(base_name, transformation)
+    return draw_points
+
+
+def write_glyph(ufo_path, name, width, draw_points):
+    writer = UFOWriter(ufo_path)
+    glyph_set = writer.getGlyphSet()
+    glyph_set.writeGlyph(name, Glyph(width), drawPointsFunc=draw_points)
+    glyph_set.writeContents()
+    bump_mtime(os.path.join(ufo_path, "glyphs", glyph_set.contents[name]))
+
+
+def bump_mtime(path):
+    # Edits within the same file system tick still count as changes.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def ufo_path(tmp_path):
+    path = str(tmp_path / "Test.ufo")
+    writer = UFOWriter(path)
+    writer.writeInfo(Info())
+    glyph_set = writer.getGlyphSet()
+    glyph_set.writeGlyph("H", Glyph(600), drawPointsFunc=rectangle(50, 0, 550, 700))
+    glyph_set.writeGlyph("o", Glyph(500), drawPointsFunc=rectangle(40, -10, 460, 510))
+    glyph_set.writeGlyph("period", Glyph(200), drawPointsFunc=rectangle(50, 0, 150, 100))
+    glyph_set.writeGlyph("colon", Glyph(200), drawPointsFunc=rectangle(60, 300, 140, 380, [("period", (1, 0, 0, 1, 0, 0))]))
+    glyph_set.writeContents()
+    writer.writeLayerContents()
+    return path
+
+
+class Recorder:
+    '''A UFOWatcher that notes which glyphs it checks'''
+
+    def __init__(self, ufo_path):
+        self.lines = []
+        self.watcher = UFOWatcher(ufo_path, emit=self.lines.append)
+        self.checked = []
+        check_glyph = self.watcher.check_glyph
+        def record(layer, glyph_name):
+            self.checked.append(glyph_name)
+            check_glyph(layer, glyph_name)
+        self.watcher.check_glyph = record
+
+
+    def poll(self):
+        self.lines, self.checked = [], []
+        self.watcher.emit = self.lines.append
+        self.watcher.poll()
+        return sorted(self.lines), sorted(self.checked)
+
+
+def test_first_poll_checks_everything(ufo_path):
+    recorder = Recorder(ufo_path)
+    lines, checked = recorder.poll()
+    assert checked == ["H", "colon", "o", "period"]
+    assert "+ H [public.default]  on-curve (50, 700)  fontDimension 700" in lines
+    assert "+ period [public.default]  on-curve (50, 0)  fontDimension 0" in lines
+    # The period's points, through the component
+    assert "+ colon [public.default]  component (50, 0)  fontDimension 0" in lines
+    assert not any(" o " in line for line in lines)
+    # Nothing changed since.
+    assert recorder.poll() == ([], [])
+
+
+def test_edited_glyph_and_its_users_are_checked_again(ufo_path):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    write_glyph(ufo_path, "period", 200, rectangle(50, 0, 150, 500))
+    lines, checked = recorder.poll()
+    assert checked == ["colon", "period"]
+    assert lines == sorted([
+        "+ colon [public.default]  component (150, 500)  fontDimension 500",
+        "+ colon [public.default]  component (50, 500)  fontDimension 500",
+        "+ period [public.default]  on-curve (150, 500)  fontDimension 500",
+        "+ period [public.default]  on-curve (50, 500)  fontDimension 500",
+        ])
+
+
+def test_fontinfo_change_only_checks_glyphs_on_changed_values(ufo_path):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    info_path = os.path.join(ufo_path, "fontinfo.plist")
+    with open(info_path, "rb") as f:
+        info = plistlib.load(f)
+    info["xHeight"] = 510
+    with open(info_path, "wb") as f:
+        plistlib.dump(info, f)
+    bump_mtime(info_path)
+    lines, checked = recorder.poll()
+    # Only "o" has points on 500 or 510.
+    assert checked == ["o"]
+    assert lines == sorted([
+        "+ o [public.default]  on-curve (40, 510)  fontDimension 510",
+        "+ o [public.default]  on-curve (460, 510)  fontDimension 510",
+        ])
+
+
+def test_italic_angle_checks_every_glyph(ufo_path):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    info_path = os.path.join(ufo_path, "fontinfo.plist")
+    with open(info_path, "rb") as f:
+        info = plistlib.load(f)
+    info["italicAngle"] = -12
+    with open(info_path, "wb") as f:
+        plistlib.dump(info, f)
+    bump_mtime(info_path)
+    lines, checked = recorder.poll()
+    assert checked == ["H", "colon", "o", "period"]
+
+
+def test_removed_glyph_takes_its_findings(ufo_path):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    writer = UFOWriter(ufo_path)
+    glyph_set = writer.getGlyphSet()
+    glyph_set.deleteGlyph("H")
+    glyph_set.writeContents()
+    lines, checked = recorder.poll()
+    assert "H" in checked
+    assert lines and all(line.startswith("- H ") for line in lines)
+
+
+def test_once(ufo_path, capsys):
+    main([ufo_path, "--once", "--skip", "fontDimension"])
+    assert capsys.readouterr().out == ""
+
+
+def test_layer_directory_not_written_yet(ufo_path):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    layer_contents_path = os.path.join(ufo_path, "layercontents.plist")
+    with open(layer_contents_path, "wb") as f:
+        plistlib.dump([["public.default", "glyphs"], ["background", "glyphs.background"]], f)
+    assert recorder.poll() == ([], [])
+
+    # Once it's there, it's picked up.
+    writer = UFOWriter(ufo_path, validate=False)
+    glyph_set = writer.getGlyphSet("background", defaultLayer=False)
+    glyph_set.writeGlyph("H", Glyph(600), drawPointsFunc=rectangle(50, 0, 550, 700))
+    glyph_set.writeContents()
+    lines, checked = recorder.poll()
+    assert checked == ["H"]
+    assert "+ H [background]  on-curve (50, 700)  fontDimension 700" in lines
+
+
+def test_ufo_swapped_in_by_a_rename(ufo_path):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    # Saving to a temporary UFO, then renaming it over the old one
+    saved_path = ufo_path + ".saving"
+    os.rename(ufo_path, saved_path)
+    assert recorder.poll() == ([], [])
+    os.rename(saved_path, ufo_path)
+    assert recorder.poll() == ([], [])
+
+
+def test_glif_deleted_while_listed(ufo_path, monkeypatch):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    scandir = os.scandir
+    class Gone:
+        name = "H_.glif"
+        def stat(self):
+            raise FileNotFoundError(self.name)
+    class Listing:
+        def __init__(self, path):
+            self.entries = scandir(path)
+        def __enter__(self):
+            return [Gone() if entry.name == Gone.name else entry for entry in self.entries.__enter__()]
+        def __exit__(self, *args):
+            return self.entries.__exit__(*args)
+    monkeypatch.setattr(os, "scandir", Listing)
+    lines, checked = recorder.poll()
+    assert checked == ["H"]
+    assert lines and all(line.startswith("- H ") for line in lines)
+
+
+def test_guides_added_and_removed(ufo_path):
+    recorder = Recorder(ufo_path)
+    recorder.poll()
+    info_path = os.path.join(ufo_path, "fontinfo.plist")
+    with open(info_path, "rb") as f:
+        info = plistlib.load(f)
+    info["guidelines"] = [{"x": 40}, {"y": 380}]
+    with open(info_path, "wb") as f:
+        plistlib.dump(info, f)
+    bump_mtime(info_path)
+    lines, checked = recorder.poll()
+    assert checked == ["colon", "o"]
+    assert "+ o [public.default]  on-curve (40, -10)  globalGuide 40" in lines
+    assert "+ colon [public.default]  on-curve (60, 380)  globalGuide 380" in lines
+
+    del info["guidelines"]
+    with open(info_path, "wb") as f:
+        plistlib.dump(info, f)
+    bump_mtime(info_path)
+    lines, checked = recorder.poll()
+    assert checked == ["colon", "o"]
+    assert lines and all(line.startswith("- ") for line in lines)
+
+
+def test_vertical_guide_added_to_an_italic_font(ufo_path):
+    info_path = os.path.join(ufo_path, "fontinfo.plist")
+    with open(info_path, "rb") as f:
+        info = plistlib.load(f)
+    info["italicAngle"] = -12
+    with open(info_path, "wb") as f:
+        plistlib.dump(info, f)
+    # At -12°, (143, 200) sits on a vertical guide at x=100, slanted.
+    write_glyph(ufo_path, "slash", 300, rectangle(143, 200, 200, 300))
+    recorder = Recorder(ufo_path)
+    recorder.watcher.slant_vertical_guides = True
+    recorder.poll()
+
+    info["guidelines"] = [{"x": 100}]
+    with open(info_path, "wb") as f:
+        plistlib.dump(info, f)
+    bump_mtime(info_path)
+    lines, checked = recorder.poll()
+    assert checked == ["slash"]
+    assert lines == ["+ slash [public.default]  on-curve (143, 200)  globalGuide 100"]